@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import json
+import mmap
+import bisect
+
+from atomic_write import atomic_write
+
+class ArticleArchive:
+    """published-articles.txtを 記事 → セクション → 段落 のバイト位置で引けるようにした索引"""
+    
+    INDEX_VERSION = 1
+    
+    ARTICLE_HEADER = re.compile(r'^【(.+?)】投稿日[：:](.*)$')
+    SECTION_HEADER = re.compile(r'^【(.+?)】(.*)$')
+    
+    def __init__(self, archive_file, index_file):
+        self.archive_file = archive_file
+        self.index_file = index_file
+        self.articles = []
+        self._starts = []       # 段落ID -> 開始バイト位置（昇順）
+        self._ends = []         # 段落ID -> 終了バイト位置
+        self._owners = []       # 段落ID -> (記事ID, セクション名)
+        self._ranges = []       # 記事ID -> その記事の段落IDの範囲
+        self._file = None
+        self._body = None
+        self.source = None      # 索引を作った時のアーカイブのサイズと更新時刻
+        
+        if os.path.exists(archive_file):
+            self._load()
+    
+    def _fingerprint(self):
+        stat = os.stat(self.archive_file)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': self.INDEX_VERSION}
+    
+    def _load(self):
+        """索引を読み込む（アーカイブが更新されていれば作り直す）"""
+        fingerprint = self._fingerprint()
+        index = None
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('source') != fingerprint:
+                index = None
+        
+        if index is None:
+            index = {'source': fingerprint, 'articles': self.build_index()}
+            atomic_write(self.index_file, json.dumps(index, ensure_ascii=False))
+        
+        self.source = fingerprint
+        self.articles = index['articles']
+        for article_id, article in enumerate(self.articles):
+            first = len(self._starts)
+            for section in article['sections']:
+                for start, end in section['paragraphs']:
+                    self._starts.append(start)
+                    self._ends.append(end)
+                    self._owners.append((article_id, section['name']))
+            self._ranges.append(range(first, len(self._starts)))
+        
+        # 本文は必要な段落だけをメモリマップから切り出す
+        if fingerprint['size']:
+            self._file = open(self.archive_file, 'rb')
+            self._body = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def build_index(self):
+        """アーカイブを1回走査して、記事・セクション・段落のバイト位置を記録"""
+        articles = []
+        article = None
+        section = None
+        offset = 0
+        
+        with open(self.archive_file, 'rb') as f:
+            for raw_line in f:
+                line_start = offset
+                offset += len(raw_line)
+                line = raw_line.decode('utf-8').rstrip('\r\n')
+                stripped = line.strip()
+                
+                if stripped == '---':
+                    article = section = None
+                    continue
+                
+                match = self.ARTICLE_HEADER.match(stripped)
+                if match:
+                    section = {'name': '', 'paragraphs': []}
+                    article = {'title': match.group(1), 'posted': match.group(2).strip(), 'sections': [section]}
+                    articles.append(article)
+                    continue
+                if article is None or not stripped:
+                    continue
+                
+                body = raw_line.rstrip(b'\r\n')
+                match = self.SECTION_HEADER.match(stripped)
+                if match:
+                    section = {'name': match.group(1), 'paragraphs': []}
+                    article['sections'].append(section)
+                    if not match.group(2).strip():
+                        continue
+                    # 見出しと同じ行に続く本文は、その部分だけを段落にする
+                    header_end = body.index('】'.encode('utf-8')) + len('】'.encode('utf-8'))
+                    line_start += header_end
+                    body = body[header_end:]
+                
+                # 前後の空白を除いた範囲を段落として記録
+                leading = len(body) - len(body.lstrip())
+                section['paragraphs'].append([line_start + leading, line_start + len(body.rstrip())])
+        
+        for article in articles:
+            article['sections'] = [s for s in article['sections'] if s['paragraphs'] or s['name']]
+        return articles
+    
+    def is_stale(self):
+        """索引を開いた後にアーカイブが更新・作成・削除されたか"""
+        if not os.path.exists(self.archive_file):
+            return self.source is not None
+        return self._fingerprint() != self.source
+    
+    def __len__(self):
+        return len(self._starts)
+    
+    def paragraph(self, paragraph_id):
+        """段落の本文を返す"""
+        return self._body[self._starts[paragraph_id]:self._ends[paragraph_id]].decode('utf-8')
+    
+    def describe(self, paragraph_id):
+        """段落の (記事タイトル, セクション名, 本文) を返す"""
+        article_id, section_name = self._owners[paragraph_id]
+        return self.articles[article_id]['title'], section_name, self.paragraph(paragraph_id)
+    
+    def paragraph_ids_containing(self, keyword):
+        """キーワードを含む段落IDを、アーカイブ内の順番で返す"""
+        if self._body is None or not keyword:
+            return []
+        
+        needle = keyword.encode('utf-8')
+        paragraph_ids = []
+        position = self._body.find(needle)
+        while position != -1:
+            paragraph_id = bisect.bisect_right(self._starts, position) - 1
+            if paragraph_id >= 0 and position + len(needle) <= self._ends[paragraph_id]:
+                if not paragraph_ids or paragraph_ids[-1] != paragraph_id:
+                    paragraph_ids.append(paragraph_id)
+                # 同じ段落内の残りの一致は読み飛ばす
+                position = self._body.find(needle, self._ends[paragraph_id])
+            else:
+                position = self._body.find(needle, position + 1)
+        return paragraph_ids
+    
+    def find_paragraphs(self, topic, keywords=(), limit=3, min_length=20):
+        """テーマに関連する過去の段落を (記事タイトル, セクション名, 本文) で返す"""
+        scores = {}
+        
+        # タイトルがテーマに含まれる記事の段落を優先する（例: 「ビタミンCの摂り方」→【ビタミンC】）
+        for article_id, article in enumerate(self.articles):
+            title = article['title'].split('（')[0]
+            if title and title in topic:
+                for paragraph_id in self._ranges[article_id]:
+                    scores[paragraph_id] = scores.get(paragraph_id, 0) + len(keywords) + 1
+        
+        # 含まれるキーワードの種類が多い段落ほど上位にする
+        for keyword in dict.fromkeys(keywords):
+            for paragraph_id in self.paragraph_ids_containing(keyword):
+                scores[paragraph_id] = scores.get(paragraph_id, 0) + 1
+        
+        ranked = sorted(scores, key=lambda paragraph_id: (-scores[paragraph_id], paragraph_id))
+        results = []
+        for paragraph_id in ranked:
+            if self._ends[paragraph_id] - self._starts[paragraph_id] < min_length * 3:
+                continue
+            results.append(self.describe(paragraph_id))
+            if len(results) >= limit:
+                break
+        return results
+    
+    def close(self):
+        if self._body is not None:
+            self._body.close()
+            self._file.close()
+            self._body = self._file = None
+
+def main():
+    if len(sys.argv) < 2:
+        print("使用方法: python archive.py <テーマ> [キーワード...]")
+        sys.exit(1)
+    
+    archive = ArticleArchive("published-articles.txt", os.path.join(".cache", "archive-index.json"))
+    print(f"{len(archive.articles)}記事・{len(archive)}段落")
+    for title, section_name, paragraph in archive.find_paragraphs(sys.argv[1], sys.argv[2:]):
+        print(f"【{title}】{section_name}: {paragraph}")
+    archive.close()
+
+if __name__ == "__main__":
+    main()
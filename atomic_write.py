@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import itertools
+
+# 同じプロセス内で一時ファイル名が重ならないようにする通し番号
+_temp_counter = itertools.count()
+
+def fsync_directory(directory):
+    """ディレクトリのエントリ（rename の結果）をディスクまで書き出す（対応しないOSでは何もしない）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def atomic_write(path, content, encoding='utf-8', buffer_size=64 * 1024):
+    """文字列または文字列の断片の並びを、一時ファイルに書いてから置き換える
+    
+    書き込み中に失敗しても、書きかけのファイルが path に残ることはない。
+    書き込んだ文字数を返す。
+    """
+    directory, name = os.path.split(path)
+    os.makedirs(directory or '.', exist_ok=True)
+    
+    if isinstance(content, str):
+        content = (content,)
+    
+    # 同じディレクトリに作ることで、置き換えが同じファイルシステム内の rename で済む
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.{next(_temp_counter)}.tmp")
+    try:
+        char_count = 0
+        with open(temp_path, 'x', encoding=encoding, buffering=buffer_size) as f:
+            for chunk in content:
+                f.write(chunk)
+                char_count += len(chunk)
+            # 置き換える前に中身をディスクまで書き出す（電源断の後に空や書きかけのファイルが現れないように）
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        fsync_directory(directory or '.')
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    
+    return char_count
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""カテゴリ分類のスループット計測（1年分の合成メモ）
+
+使用方法: python bench/bench_categorize.py [1日あたりのメモ数]
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from organize import IshiharaNotesOrganizer
+
+# raw-notes.txt によく出てくる言い回しの断片
+FRAGMENTS = [
+    "お客様から「プロテイン美味しくて続けられる」と言われた",
+    "毎日やらなくても週2回で十分って伝えた",
+    "楽しさが継続の秘訣やと改めて実感",
+    "反り腰の改善について相談された",
+    "睡眠不足のお客様が多い",
+    "業界の「必ず痩せる」系の広告見てイライラ",
+    "完璧なトレーナーより親近感のあるトレーナーの方がいいのかも",
+    "気持ちめっちゃわかる、昔の自分もそうやったし",
+    "股関節の可動域から見直しが必要",
+    "今日は雨で来店が少なかった",
+]
+
+def synthesize_year(notes_per_day, seed=0):
+    """1年分（365日）の合成メモを日付ごとの行リストで返す"""
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    days = []
+    for offset in range(365):
+        lines = [f"{rng.choice(FRAGMENTS)}（{rng.randint(1, 9999)}）" for _ in range(notes_per_day)]
+        days.append(((start + timedelta(days=offset)).isoformat(), lines))
+    return days
+
+def categorize_naive(organizer, notes_lines):
+    """従来の入れ子ループ版（比較用）"""
+    categories = {category: [] for category in organizer.CATEGORIES}
+    for note in notes_lines:
+        for category, keywords in organizer.KEYWORD_MAP.items():
+            if any(keyword in note for keyword in keywords):
+                categories[category].append(note)
+                break
+        else:
+            categories['その他'].append(note)
+    return {k: v for k, v in categories.items() if v}
+
+def measure(label, categorize, days, total_notes):
+    started = time.perf_counter()
+    results = [categorize(lines) for _, lines in days]
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed:.3f}秒（{total_notes / elapsed:,.0f}件/秒）")
+    return results
+
+def main():
+    notes_per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    days = synthesize_year(notes_per_day)
+    total_notes = sum(len(lines) for _, lines in days)
+    print(f"合成メモ: {len(days)}日分 / {total_notes}件")
+    
+    started = time.perf_counter()
+    organizer = IshiharaNotesOrganizer()
+    print(f"オートマトン構築: {(time.perf_counter() - started) * 1000:.2f}ミリ秒")
+    
+    naive = measure("入れ子ループ", lambda lines: categorize_naive(organizer, lines), days, total_notes)
+    compiled = measure("Aho–Corasick", organizer.categorize_notes, days, total_notes)
+    
+    if naive != compiled:
+        print("エラー: 分類結果が一致しません")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
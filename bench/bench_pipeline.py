@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""organize.py / generate.py の各段階の処理時間とピークメモリの計測
+
+合成したメモ・考え・マニフェストを規模（メモの件数）ごとに用意して各段階を計測し、
+結果をJSONで保存する。--compare で別のコミットの結果と比べられる。
+
+使用方法: python bench/bench_pipeline.py [--scales 1000,10000,100000] [--output PATH]
+                                         [--compare PATH] [--no-memory]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import date, datetime, timedelta
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT_DIR)
+
+from organize import IshiharaNotesOrganizer
+from generate import IshiharaArticleGenerator
+from bench_categorize import FRAGMENTS
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+NOTES_PER_DAY = 10
+
+# 合成するテーマ（末尾に番号を付けて件数を増やす）
+TOPICS = ["プロテインの選び方", "筋トレの頻度", "継続のコツ", "姿勢改善", "睡眠の質", "食事と栄養"]
+
+def synthesize_raw_notes(note_count, rng):
+    """raw-notes.txt 形式のメモ（新しい日付が先頭）"""
+    lines = []
+    start = date(2025, 12, 31)
+    for offset, first in enumerate(range(0, note_count, NOTES_PER_DAY)):
+        lines.append((start - timedelta(days=offset)).isoformat())
+        for i in range(first, min(first + NOTES_PER_DAY, note_count)):
+            lines.append(f"{rng.choice(FRAGMENTS)}（{i}）")
+            if rng.random() < 0.3:
+                lines.append("")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+def synthesize_current_thoughts(thought_count, rng):
+    """current-thoughts.txt 形式の考え（カテゴリごとに均等に割り振る）"""
+    categories = IshiharaNotesOrganizer.CATEGORIES
+    per_category = max(1, thought_count // len(categories))
+    lines = ["=== 石原トレーナーの現在の考え・哲学 ===", "最終更新: 2025-12-31 00:00", ""]
+    for category in categories:
+        lines.append(f"【{category}】")
+        for i in range(per_category):
+            lines.append(f"・{rng.choice(FRAGMENTS)}（{i}）")
+        lines.append("")
+    return "\n".join(lines)
+
+def synthesize_manifest(topic_count):
+    """(テーマ, プラットフォーム) の組"""
+    topics = [f"{TOPICS[i % len(TOPICS)]}{i}" for i in range(topic_count)]
+    return [(topic, platform_name) for topic in topics for platform_name in IshiharaArticleGenerator.PLATFORMS]
+
+def measure(func, items, track_memory):
+    """1回目で時間を、2回目で（有効なら）ピークメモリを測る"""
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    
+    record = {
+        'seconds': round(elapsed, 6),
+        'items': items,
+        'items_per_second': round(items / elapsed, 1) if elapsed > 0 else None
+    }
+    if track_memory:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        record['peak_kib'] = round(peak / 1024, 1)
+    return result, record
+
+def bench_scale(note_count, track_memory, seed=0):
+    """1つの規模で全段階を計測"""
+    rng = random.Random(seed)
+    stages = {}
+    
+    with tempfile.TemporaryDirectory(prefix="ishihara-bench-") as work_dir:
+        with open(os.path.join(work_dir, "raw-notes.txt"), 'w', encoding='utf-8') as f:
+            f.write(synthesize_raw_notes(note_count, rng))
+        with open(os.path.join(work_dir, "current-thoughts.txt"), 'w', encoding='utf-8') as f:
+            f.write(synthesize_current_thoughts(max(10, note_count // 10), rng))
+        with open(os.path.join(ROOT_DIR, "style-guide.txt"), 'r', encoding='utf-8') as f:
+            style_guide = f.read()
+        with open(os.path.join(work_dir, "style-guide.txt"), 'w', encoding='utf-8') as f:
+            f.write(style_guide)
+        
+        # organize.py の各段階
+        organizer = IshiharaNotesOrganizer(work_dir)
+        organized_notes, stages['parse_raw_notes'] = measure(organizer.parse_raw_notes, note_count, track_memory)
+        notes_lines = [note for categories in organized_notes.values()
+                       for notes in categories.values() for note in notes]
+        _, stages['categorize_notes'] = measure(lambda: organizer.categorize_notes(notes_lines),
+                                                len(notes_lines), track_memory)
+        _, stages['generate_current_thoughts'] = measure(lambda: organizer.generate_current_thoughts(organized_notes),
+                                                         len(notes_lines), track_memory)
+        _, stages['detect_evolution'] = measure(lambda: organizer.detect_evolution(organized_notes),
+                                                len(notes_lines), track_memory)
+        
+        # generate.py の各段階（考えのインデックスは extract_relevant_thoughts の計測に含める）
+        jobs = synthesize_manifest(max(10, note_count // 100))
+        topics = sorted({topic for topic, _ in jobs})
+        generator = IshiharaArticleGenerator(work_dir)
+        current_thoughts = generator.load_current_thoughts()
+        
+        def extract_all():
+            generator._thought_index = None
+            return {topic: generator.extract_relevant_thoughts(topic, current_thoughts) for topic in topics}
+        relevant, stages['extract_relevant_thoughts'] = measure(extract_all, len(topics), track_memory)
+        
+        contents = []
+        for platform_name in generator.PLATFORMS:
+            platform_jobs = [topic for topic, name in jobs if name == platform_name]
+            rendered, stages[f'render_{platform_name}'] = measure(
+                lambda: [(topic, platform_name, generator.render_article(topic, platform_name, relevant[topic], seed))
+                         for topic in platform_jobs],
+                len(platform_jobs), track_memory)
+            contents.extend(rendered)
+        
+        _, stages['save_article'] = measure(
+            lambda: [generator.save_article(content, topic, platform_name) for topic, platform_name, content in contents],
+            len(contents), track_memory)
+        
+        return {
+            'notes': note_count,
+            'thoughts': len(generator.get_thought_index(current_thoughts).thoughts),
+            'articles': len(contents),
+            'stages': stages
+        }
+
+def current_commit():
+    """計測したコミット（git がなければ None）"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_reports(base, report):
+    """規模・段階ごとに、基準の結果に対する処理時間の比を表示"""
+    print(f"\n比較: {base.get('commit')} -> {report.get('commit')}（処理時間の比、1未満なら速くなった）")
+    for scale, result in report['scales'].items():
+        base_result = base['scales'].get(scale)
+        if not base_result:
+            continue
+        for stage, record in result['stages'].items():
+            base_record = base_result['stages'].get(stage)
+            if base_record and base_record['seconds'] > 0:
+                print(f"  {scale}件 {stage}: {record['seconds'] / base_record['seconds']:.2f}倍")
+
+def main():
+    parser = argparse.ArgumentParser(description="organize.py / generate.py の各段階の計測")
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help="メモの件数（カンマ区切り）")
+    parser.add_argument('--output', help="結果のJSONの保存先（省略時は bench/results/pipeline-<コミット>.json）")
+    parser.add_argument('--compare', metavar='PATH', help="比べる基準の結果のJSON")
+    parser.add_argument('--no-memory', action='store_true', help="ピークメモリを測らない（計測が速く終わる）")
+    args = parser.parse_args()
+    
+    report = {
+        'commit': current_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scales': {}
+    }
+    
+    for note_count in (int(scale) for scale in args.scales.split(',')):
+        print(f"メモ{note_count}件で計測中...")
+        result = bench_scale(note_count, not args.no_memory)
+        report['scales'][str(note_count)] = result
+        for stage, record in result['stages'].items():
+            memory = f" / ピーク{record['peak_kib']:,.0f}KiB" if 'peak_kib' in record else ""
+            print(f"  {stage}: {record['seconds']:.3f}秒（{record['items_per_second'] or 0:,.0f}件/秒）{memory}")
+    
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{report['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+
+from atomic_write import atomic_write
+
+def thought_hash(thought):
+    """考え1行を識別する短いハッシュ"""
+    return hashlib.sha256(thought.encode('utf-8')).hexdigest()[:16]
+
+class BuildGraph:
+    """生成した記事ごとに、使った考えの行とカテゴリを記録する依存グラフ（.cache/build-graph.json）"""
+    
+    def __init__(self, graph_file):
+        self.graph_file = graph_file
+        self._articles = None
+        self._dirty = False
+    
+    def articles(self):
+        """(テーマ, プラットフォーム) -> 記事の記録"""
+        if self._articles is None:
+            self._articles = {}
+            if os.path.exists(self.graph_file):
+                with open(self.graph_file, 'r', encoding='utf-8') as f:
+                    for entry in json.load(f)['articles']:
+                        self._articles[(entry['topic'], entry['platform'])] = entry
+        return self._articles
+    
+    def record(self, topic, platform, seed, use_archive, thoughts, categories, key, filepath):
+        """記事とその入力を登録（同じテーマとプラットフォームは最新の生成で置き換える）
+        
+        thoughts と categories は、使った考えの行とそれぞれの【カテゴリ】の並び。
+        """
+        self.articles()[(topic, platform)] = {
+            'topic': topic,
+            'platform': platform,
+            'seed': seed,
+            'archive': use_archive,
+            'thoughts': [[thought_hash(thought), category] for thought, category in zip(thoughts, categories)],
+            'categories': sorted({category for category in categories if category}),
+            'key': key,
+            'path': filepath
+        }
+        self._dirty = True
+    
+    def diff_thoughts(self, entry, thoughts, categories):
+        """記録した考えと新しい考えを比べ、(追加された行数, 消えた行数, 変わったカテゴリ) を返す"""
+        old = {thought: category for thought, category in entry['thoughts']}
+        new = {thought_hash(thought): category for thought, category in zip(thoughts, categories)}
+        added = new.keys() - old.keys()
+        removed = old.keys() - new.keys()
+        changed = {new[thought] for thought in added} | {old[thought] for thought in removed}
+        return len(added), len(removed), sorted(category for category in changed if category)
+    
+    def save(self):
+        if self._dirty:
+            atomic_write(self.graph_file, json.dumps({'articles': list(self.articles().values())},
+                                                     ensure_ascii=False, indent=1))
+            self._dirty = False
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+from collections import OrderedDict
+
+class LRUCache:
+    """上限付きのLRUキャッシュ（ヒット・ミスの回数を記録し、JSONに保存できる）"""
+    
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get(self, key, default=None):
+        """値を取り出す（見つかれば最近使ったものとして末尾に移す）"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return default
+    
+    def put(self, key, value):
+        """値を登録し、上限を超えたら最も古く使われたものから捨てる"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def stats(self):
+        """ヒット率などの統計"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'maxsize': self.maxsize
+        }
+    
+    def load(self, path):
+        """保存しておいたエントリを読み込む（古い順に並んでいる）"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for key, value in json.load(f):
+                self.put(tuple(key), value)
+    
+    def save(self, path):
+        """エントリを古い順にJSONで保存"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([[list(key), value] for key, value in self._entries.items()], f, ensure_ascii=False)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""過去記事・生成済みの記事と重複する段落の検出
+
+published-articles.txt と output/ 以下の記事の段落ごとにSimHash（64ビット）を計算して
+.cache/duplicate-index.json に保存し、ファイル単位で差分更新する。新しい下書きの段落は
+16ビットのブロックに分けた多重索引で近い指紋だけを調べるので、記事どうしを総当たりで比べずに済む。
+
+生成済みの記事どうしで多くの記事に似た形で出てくる段落（テンプレートの定型文など）は
+重複として報告しない。過去記事と似ている段落は常に報告する。
+
+使用方法: python duplicates.py <記事ファイル>...
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from atomic_write import atomic_write
+from similarity import SimHashIndex, simhash, shingles
+from search import read_passages, output_files, markdown_paragraphs
+
+class DuplicateIndex:
+    """過去記事と生成済みの記事の段落の指紋から、下書きと似ている段落を探す索引"""
+    
+    INDEX_VERSION = 1
+    # 文字2-gramの種類がこれより少ない短い段落（挨拶や締めの一文など）は比べない
+    MIN_LENGTH = 30
+    # 生成済みの記事のうち、この数以上の記事に似た段落があればテンプレートなどの定型文として扱う
+    COMMON_SOURCES = 3
+    ARCHIVE_FILE = "published-articles.txt"
+    
+    def __init__(self, base_dir=".", max_distance=10):
+        self.base_dir = base_dir
+        self.max_distance = max_distance
+        self.index_file = os.path.join(base_dir, ".cache", "duplicate-index.json")
+        self.files = {}         # 相対パス -> {'fingerprint': [サイズ, 更新時刻], 'passages': [[場所, 指紋, 抜粋]]}
+        self._index = None      # 指紋の索引（更新後に初めて照合する時に作る）
+        self._passages = {}     # 指紋 -> [(相対パス, 場所, 抜粋)]
+        
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == self.INDEX_VERSION:
+                self.files = index['files']
+    
+    @classmethod
+    def comparable(cls, text):
+        """重複を調べる段落か（短い段落・見出し・引用は除く）"""
+        if text.startswith('#') or text.startswith('>'):
+            return False
+        return len(shingles(text)) >= cls.MIN_LENGTH
+    
+    def source_files(self):
+        """索引するファイル（相対パス）"""
+        paths = [self.ARCHIVE_FILE] if os.path.exists(os.path.join(self.base_dir, self.ARCHIVE_FILE)) else []
+        return paths + output_files(self.base_dir)
+    
+    def index_file_passages(self, path, fingerprint):
+        """1ファイル分の段落の指紋を計算"""
+        passages = []
+        for location, text in read_passages(self.base_dir, path):
+            if self.comparable(text):
+                passages.append([location, simhash(text), self.snippet(text)])
+        self.files[path] = {'fingerprint': fingerprint, 'passages': passages}
+    
+    def update(self):
+        """変更・追加されたファイルだけを索引し直す（変更があれば保存）"""
+        changed = 0
+        paths = self.source_files()
+        
+        for path in paths:
+            stat = os.stat(os.path.join(self.base_dir, path))
+            fingerprint = [stat.st_size, stat.st_mtime_ns]
+            if path not in self.files or self.files[path]['fingerprint'] != fingerprint:
+                self.index_file_passages(path, fingerprint)
+                changed += 1
+        
+        removed = set(self.files) - set(paths)
+        for path in removed:
+            del self.files[path]
+        
+        if changed or removed:
+            self._index = None
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            atomic_write(self.index_file, json.dumps({'version': self.INDEX_VERSION, 'files': self.files},
+                                                     ensure_ascii=False))
+        
+        return changed, len(removed)
+    
+    def index(self):
+        """指紋の索引を作る（同じ指紋は1つにまとめる）"""
+        if self._index is None:
+            self._index = SimHashIndex(self.max_distance)
+            self._passages = {}
+            for path, entry in self.files.items():
+                for location, fingerprint, snippet in entry['passages']:
+                    self._index.add(fingerprint)
+                    self._passages.setdefault(fingerprint, []).append((path, location, snippet))
+        return self._index
+    
+    def check(self, content, exclude=None, boilerplate=frozenset()):
+        """下書きの段落と似ている既存の段落を探す
+        
+        exclude(相対パス) が真になるファイル（下書き自身や、同じテーマの以前の版など）は除く。
+        全ての行が boilerplate に含まれる段落（テンプレートの定型文など）は調べない。
+        (行番号, 段落の抜粋, 既存の場所, 既存の抜粋, ハミング距離) を行番号の順に返す。
+        """
+        index = self.index()
+        overlaps = []
+        for line_no, text in markdown_paragraphs(content.split('\n')):
+            if not self.comparable(text) or all(line in boilerplate for line in text.split('\n')):
+                continue
+            matches = []
+            for other, distance in index.query(simhash(text)):
+                for path, location, snippet in self._passages[other]:
+                    if not (exclude and exclude(path)):
+                        matches.append((path, location, snippet, distance))
+            
+            # 多くの生成済みの記事に似た段落があるなら定型文なので、過去記事との一致だけを残す
+            if len({path for path, *_ in matches if path != self.ARCHIVE_FILE}) >= self.COMMON_SOURCES:
+                matches = [match for match in matches if match[0] == self.ARCHIVE_FILE]
+            
+            for path, location, snippet, distance in matches:
+                overlaps.append((line_no, self.snippet(text), location, snippet, distance))
+        return overlaps
+    
+    @staticmethod
+    def snippet(text, length=40):
+        snippet = text.replace('\n', ' ')
+        return snippet[:length] + '…' if len(snippet) > length else snippet
+
+def print_overlaps(overlaps, indent="  "):
+    """重複した段落を表示"""
+    for line_no, text, location, snippet, distance in overlaps:
+        print(f"{indent}{line_no}行目「{text}」")
+        print(f"{indent}  ≈ {location}（距離{distance}）「{snippet}」")
+
+def main():
+    parser = argparse.ArgumentParser(description="記事の段落が過去記事・生成済みの記事と重複していないか調べる")
+    parser.add_argument('files', nargs='+', help="調べる記事ファイル（output/<プラットフォーム>/ 以下なら定型文を除いて調べる）")
+    args = parser.parse_args()
+    
+    # 生成した記事は、ジェネレーターと同じ条件（同じテーマの記事と定型文を除く）で調べる
+    from generate import IshiharaArticleGenerator
+    generator = IshiharaArticleGenerator()
+    
+    started = time.perf_counter()
+    index = generator.get_duplicate_index()
+    index.index()
+    indexed = time.perf_counter()
+    
+    found = 0
+    for filepath in args.files:
+        if not os.path.exists(filepath):
+            print(f"エラー: {filepath} が見つかりません")
+            continue
+        platform = os.path.basename(os.path.dirname(os.path.abspath(filepath)))
+        if platform in generator.PLATFORMS:
+            topic = os.path.basename(filepath).rsplit('_', 2)[0].replace('_', ' ')
+            overlaps = generator.check_duplicates(filepath, topic, platform, index)
+        else:
+            path = os.path.relpath(filepath)
+            with open(filepath, 'r', encoding='utf-8') as f:
+                overlaps = index.check(f.read(), exclude=lambda other: other == path)
+        if overlaps:
+            found += 1
+            print(f"{filepath}: 似ている段落{len(overlaps)}件")
+            print_overlaps(overlaps)
+    
+    checked = time.perf_counter()
+    print(f"{len(args.files)}件中{found}件に重複がありました（照合 {(checked - indexed) * 1000:.1f}ミリ秒、"
+          f"索引の準備 {(indexed - started) * 1000:.1f}ミリ秒）")
+    if found:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import json
+import bisect
+import argparse
+from datetime import datetime
+
+class EvolutionStore:
+    """考えの変化履歴を (日付, カテゴリ, 以前の考え, 現在の考え) で一意に管理する追記専用ストア"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.entries = []
+        self._keys = set()
+        self._by_date = []          # (日付, エントリID) の昇順
+        self._by_category = {}      # カテゴリ -> (日付, エントリID) の昇順
+        
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line), sort=False)
+            # 読み込み時は末尾に足していき、最後に1回だけ並べ替える
+            self._by_date.sort()
+            for rows in self._by_category.values():
+                rows.sort()
+    
+    @staticmethod
+    def key(entry):
+        """変化履歴の一意キー"""
+        return (entry['date'], entry['category'], entry['previous'], entry['current'])
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __contains__(self, entry):
+        return self.key(entry) in self._keys
+    
+    def _index(self, entry, sort=True):
+        """エントリをメモリ上の索引に登録（sort=False なら並び順は呼び出し側で整える）"""
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        self._keys.add(self.key(entry))
+        row = (entry['date'], entry_id)
+        category_rows = self._by_category.setdefault(entry['category'], [])
+        if sort:
+            bisect.insort(self._by_date, row)
+            bisect.insort(category_rows, row)
+        else:
+            self._by_date.append(row)
+            category_rows.append(row)
+    
+    def add_many(self, evolution_log, recorded_at=None):
+        """未登録の変化だけを追記し、新しく登録したエントリを返す"""
+        recorded_at = recorded_at or datetime.now().strftime('%Y-%m-%d %H:%M')
+        added = []
+        
+        for entry in evolution_log:
+            if entry in self:
+                continue
+            record = _record(entry, recorded_at)
+            self._index(record)
+            added.append(record)
+        
+        # ファイルへは末尾に追記するだけ
+        _append_records(self.path, added)
+        return added
+    
+    def query(self, category=None, since=None, until=None):
+        """カテゴリと日付の範囲（両端を含む）で変化履歴を検索"""
+        rows = self._by_date if category is None else self._by_category.get(category, [])
+        start = bisect.bisect_left(rows, (since,)) if since else 0
+        end = bisect.bisect_right(rows, (until, sys.maxsize)) if until else len(rows)
+        return [self.entries[entry_id] for _, entry_id in rows[start:end]]
+    
+    def import_text_log(self, text_log_file):
+        """従来のevolution-log.txtの内容を取り込む"""
+        return self.add_many(parse_text_log(text_log_file))
+    
+    def render_text(self):
+        """変化履歴をevolution-log.txtの形式で出力（記録した回ごとに見出しを付ける）"""
+        return render_text_log(self.entries)
+
+def _record(entry, recorded_at):
+    """ストアに書き込む形のエントリ（キーの項目が先頭に来る順番で固定）"""
+    return {
+        'date': entry['date'],
+        'category': entry['category'],
+        'previous': entry['previous'],
+        'current': entry['current'],
+        'change_type': entry['change_type'],
+        'recorded_at': entry.get('recorded_at', recorded_at)
+    }
+
+def _append_records(path, records):
+    if records:
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def _key_prefix(entry):
+    """ストアの行のうち、キーの項目までの部分（同じキーの行は必ずこの文字列で始まる）"""
+    key = {'date': entry['date'], 'category': entry['category'],
+           'previous': entry['previous'], 'current': entry['current']}
+    return (json.dumps(key, ensure_ascii=False)[:-1] + ', "change_type": ').encode('utf-8')
+
+def append_new_entries(path, evolution_log, recorded_at=None):
+    """ストアを読み込まずに、未登録の変化だけを追記する（EvolutionStore.add_many と同じ結果）
+    
+    索引は作らず、ファイルの中にキーの部分で始まる行があるかどうかで記録済みかを調べる。
+    新しく登録したエントリと、それまでの最後のエントリの記録日時を返す。
+    """
+    recorded_at = recorded_at or datetime.now().strftime('%Y-%m-%d %H:%M')
+    data = b''
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+    
+    last_recorded_at = None
+    last_line = data.rstrip(b'\n').rpartition(b'\n')[2]
+    if last_line.strip():
+        last_recorded_at = json.loads(last_line)['recorded_at']
+    
+    added = []
+    seen = set()
+    for entry in evolution_log:
+        prefix = _key_prefix(entry)
+        if prefix in seen or data.startswith(prefix) or b'\n' + prefix in data:
+            continue
+        seen.add(prefix)
+        added.append(_record(entry, recorded_at))
+    
+    _append_records(path, added)
+    return added, last_recorded_at
+
+def parse_text_log(text_log_file):
+    """evolution-log.txtの形式のファイルから変化履歴のエントリを読み取る"""
+    header = re.compile(r'^=== 考えの変化履歴 - (.+) ===$')
+    title = re.compile(r'^【(\d{4}-\d{2}-\d{2}) - (.+)】$')
+    fields = {'変化タイプ': 'change_type', '以前の考え': 'previous', '現在の考え': 'current'}
+    
+    entries = []
+    recorded_at = None
+    entry = None
+    with open(text_log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if header.match(line):
+                recorded_at = header.match(line).group(1)
+            elif title.match(line):
+                date, category = title.match(line).groups()
+                entry = {'date': date, 'category': category, 'recorded_at': recorded_at}
+                entries.append(entry)
+            elif entry is not None and ': ' in line:
+                label, value = line.split(': ', 1)
+                if label in fields:
+                    entry[fields[label]] = value
+    
+    return [e for e in entries if all(k in e for k in fields.values())]
+
+def render_text_log(entries, after=None):
+    """変化履歴のエントリをevolution-log.txtの形式で出力（記録した回ごとに見出しを付ける）
+    
+    after に描画済みの最後のエントリの記録日時を渡すと、その続きとして末尾に追記する文字列を返す
+    （全体を描画し直した場合と同じ内容になる）。
+    """
+    blocks = []
+    log_entries = None
+    recorded_at = after
+    
+    for entry in entries:
+        if log_entries is None and after is not None and entry['recorded_at'] == after:
+            log_entries = []
+            blocks.append(log_entries)
+        elif log_entries is None or entry['recorded_at'] != recorded_at:
+            recorded_at = entry['recorded_at']
+            log_entries = [f"=== 考えの変化履歴 - {recorded_at} ===", ""]
+            blocks.append(log_entries)
+        log_entries.append(f"【{entry['date']} - {entry['category']}】")
+        log_entries.append(f"変化タイプ: {entry['change_type']}")
+        log_entries.append(f"以前の考え: {entry['previous']}")
+        log_entries.append(f"現在の考え: {entry['current']}")
+        log_entries.append("")
+    
+    text = "\n".join("\n".join(block) for block in blocks)
+    return "\n" + text if after is not None and text else text
+
+def main():
+    parser = argparse.ArgumentParser(description="考えの変化履歴を検索")
+    parser.add_argument('--category', help="カテゴリ（例: プロテイン・栄養）")
+    parser.add_argument('--since', help="この日付以降（YYYY-MM-DD）")
+    parser.add_argument('--until', help="この日付以前（YYYY-MM-DD）")
+    parser.add_argument('--store', default="evolution-log.jsonl")
+    args = parser.parse_args()
+    
+    store = EvolutionStore(args.store)
+    entries = store.query(args.category, args.since, args.until)
+    for entry in entries:
+        print(f"【{entry['date']} - {entry['category']}】{entry['previous']} → {entry['current']}")
+    print(f"{len(entries)}件")
+
+if __name__ == "__main__":
+    main()
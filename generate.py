@@ -4,16 +4,94 @@
 import os
 import sys
 import re
+import csv
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import random
 
+from thought_index import ThoughtIndex
+from notes_db import NotesDatabase
+from duplicates import DuplicateIndex, print_overlaps
+from archive import ArticleArchive
+from normalizer import ThoughtNormalizer
+from cache import LRUCache
+from atomic_write import atomic_write
+from output_store import OutputStore, content_key
+from build_graph import BuildGraph
+from profiling import profiler, start_from_options
+from templates import TemplateEngine, TEMPLATE_SUFFIX, available_platforms
+
+# 関西弁の言い換えと断片 -> 文章の変換表
+NORMALIZE_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "normalize-rules.json")
+
+# プラットフォーム別の記事テンプレート（templates/<プラットフォーム>.tmpl）
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# --deterministic でシードを指定しなかった時に使うシード
+DEFAULT_SEED = "0"
+
 class IshiharaArticleGenerator:
-    def __init__(self, base_dir="."):
+    # テンプレートを置けばプラットフォームを追加できる
+    PLATFORMS = tuple(available_platforms(TEMPLATE_DIR))
+    
+    # テーマに関連するキーワードマッピング
+    TOPIC_KEYWORDS = {
+        'プロテイン': ['プロテイン', '栄養', '食事', 'サプリ'],
+        '筋トレ': ['筋トレ', 'トレーニング', '頻度', '継続'],
+        '姿勢': ['猫背', '反り腰', '姿勢', '腰痛'],
+        '継続': ['継続', 'モチベーション', '楽しく'],
+        '睡眠': ['睡眠'],
+        '食事': ['食事', '栄養', 'プロテイン']
+    }
+    
+    # どのキーワードグループにも当てはまらないテーマに、TF-IDFの類似度で選ぶ考えの数と最低の類似度
+    FALLBACK_THOUGHTS = 5
+    FALLBACK_MIN_SCORE = 0.1
+    # 同じくテーマと共通していなければならない文字2-gramの種類数（ひらがなだけの2-gramは数えず、
+    # 「について」のような言い回しや1〜2個の偶然の重なりでは選ばない）
+    FALLBACK_MIN_MATCHES = 3
+
+    def __init__(self, base_dir=".", use_archive=False, persist_cache=False, db_file=None):
         self.base_dir = base_dir
         self.style_guide_file = os.path.join(base_dir, "style-guide.txt")
         self.current_thoughts_file = os.path.join(base_dir, "current-thoughts.txt")
+        self.published_articles_file = os.path.join(base_dir, "published-articles.txt")
+        self.cache_dir = os.path.join(base_dir, ".cache")
         self.output_dir = os.path.join(base_dir, "output")
         
+        # 過去の記事（published-articles.txt）から関連する段落を引用するか
+        self.use_archive = use_archive
+        self._archive = None
+        
+        # 過去記事・生成済みの記事の段落の指紋（下書きとの重複を調べる時に初めて開く）
+        self._duplicates = None
+        
+        # メモを文章に整える変換ルール
+        self.normalizer = ThoughtNormalizer(NORMALIZE_RULES_FILE)
+        self._rules_mtime = os.stat(NORMALIZE_RULES_FILE).st_mtime_ns
+        
+        # 展開済みの考え（persist_cache=Trueなら実行をまたいで使い回す）
+        self.expansion_cache = LRUCache(maxsize=4096)
+        self.expansion_cache_file = os.path.join(self.cache_dir, "expansions.json")
+        self.persist_cache = persist_cache
+        if persist_cache:
+            self.expansion_cache.load(self.expansion_cache_file)
+        
+        # スタイルガイド・現在の考えと、そこから構築したインデックス（ファイルが変わるまで使い回す）
+        self._style_guide = None
+        self._style_guide_stat = None
+        self._current_thoughts = None
+        self._current_thoughts_stat = None
+        self._thought_index = None
+        
+        # db_file を指定すると、現在の考えは current-thoughts.txt ではなくSQLiteから引く
+        self.db = NotesDatabase(db_file) if db_file else None
+        self._thoughts_version = None
+        
         # 石原トレーナーの表現パターン
         self.expressions = {
             'opening': [
@@ -71,461 +149,217 @@ class IshiharaArticleGenerator:
                 "皆さんの反応次第で、詳しい内容もお伝えしていきます。"
             ]
         }
+        
+        # 入力のハッシュから生成済みの記事を引く索引
+        self.output_store = OutputStore(os.path.join(self.cache_dir, "outputs.json"), base_dir)
+        
+        # 記事ごとに使った考えの行とカテゴリ（rebuild で作り直す記事を決める）
+        self.build_graph = BuildGraph(os.path.join(self.cache_dir, "build-graph.json"))
+        
+        # 記事テンプレート（初めて使う時にコンパイルして保持する）
+        self.templates = TemplateEngine(TEMPLATE_DIR, self.expressions, {
+            'title': self.extract_title_from_thought,
+            'expand_note': self.expand_thought_for_note,
+            'expand_ameblo': self.expand_thought_for_ameblo
+        })
     
+    def refresh_inputs(self):
+        """常駐して使う時に、更新された変換ルール・テンプレート・過去記事の索引を読み直す
+        
+        スタイルガイドと現在の考えは、読み込むたびに更新時刻を確認している。
+        読み直したものの名前を返す。
+        """
+        reloaded = []
+        
+        rules_mtime = os.stat(NORMALIZE_RULES_FILE).st_mtime_ns
+        if rules_mtime != self._rules_mtime:
+            # 展開キャッシュのキーにルールのバージョンが入っているので、キャッシュは消さなくてよい
+            self.normalizer = ThoughtNormalizer(NORMALIZE_RULES_FILE)
+            self._rules_mtime = rules_mtime
+            reloaded.append("normalize-rules.json")
+        
+        for platform in self.templates.refresh():
+            reloaded.append(f"templates/{platform}{TEMPLATE_SUFFIX}")
+        
+        if self._archive is not None and self._archive.is_stale():
+            self._archive.close()
+            self._archive = None
+            reloaded.append("published-articles.txt")
+        
+        return reloaded
+    
+    @profiler.timed('load')
     def load_style_guide(self):
         """スタイルガイドを読み込み"""
         if not os.path.exists(self.style_guide_file):
             print(f"警告: {self.style_guide_file} が見つかりません")
             return ""
         
-        with open(self.style_guide_file, 'r', encoding='utf-8') as f:
-            return f.read()
+        # 更新されていなければ前回読み込んだ内容をそのまま返す
+        stat = os.stat(self.style_guide_file)
+        if self._style_guide_stat != (stat.st_mtime_ns, stat.st_size):
+            with open(self.style_guide_file, 'r', encoding='utf-8') as f:
+                self._style_guide = f.read()
+            self._style_guide_stat = (stat.st_mtime_ns, stat.st_size)
+        
+        return self._style_guide
     
+    @profiler.timed('load')
     def load_current_thoughts(self):
         """現在の考えを読み込み"""
+        if self.db:
+            return self.load_current_thoughts_db()
+        
         if not os.path.exists(self.current_thoughts_file):
             print(f"警告: {self.current_thoughts_file} が見つかりません")
             return ""
         
-        with open(self.current_thoughts_file, 'r', encoding='utf-8') as f:
-            return f.read()
+        # 更新されていなければ前回読み込んだ内容をそのまま返す
+        stat = os.stat(self.current_thoughts_file)
+        if self._current_thoughts_stat != (stat.st_mtime_ns, stat.st_size):
+            with open(self.current_thoughts_file, 'r', encoding='utf-8') as f:
+                self._current_thoughts = f.read()
+            self._current_thoughts_stat = (stat.st_mtime_ns, stat.st_size)
+        
+        return self._current_thoughts
+    
+    def load_current_thoughts_db(self):
+        """現在の考えをデータベースから読み込み（保存し直されるまで前回の内容を使う）"""
+        version = self.db.thoughts_version()
+        if version is None:
+            print(f"警告: {self.db.path} に現在の考えがありません（organize.py --db で保存してください）")
+            return ""
+        
+        if version != self._thoughts_version:
+            self._current_thoughts = self.db.export_current_thoughts()
+            self._thoughts_version = version
+        
+        return self._current_thoughts
+    
+    def get_thought_index(self, current_thoughts):
+        """現在の考えのインデックスを取得（内容が変わった時だけ再構築）"""
+        index = self._thought_index
+        if index is None or (index.source is not current_thoughts and index.source != current_thoughts):
+            # データベースを使う時は、テキストを解析せずに保存済みの (カテゴリ, 考え) から作る
+            records = self.db.thought_rows() if self.db else None
+            index = ThoughtIndex(current_thoughts, self.TOPIC_KEYWORDS, records)
+            self._thought_index = index
+        return index
+    
+    def get_archive(self):
+        """過去記事の索引を開く（初回のみ）"""
+        if self._archive is None:
+            self._archive = ArticleArchive(self.published_articles_file,
+                                           os.path.join(self.cache_dir, "archive-index.json"))
+        return self._archive
+    
+    def get_duplicate_index(self):
+        """重複を調べる索引を開き、追加・更新された記事を取り込む"""
+        if self._duplicates is None:
+            self._duplicates = DuplicateIndex(self.base_dir)
+        self._duplicates.update()
+        return self._duplicates
+    
+    def boilerplate_lines(self, topic, platform):
+        """考えによらない定型の行（テンプレートの地の文・表現パターン・展開の決まり文句）"""
+        lines = set()
+        expr_slot = re.compile(r'\{expr:(\w+)(?:\|topic=([^}]*))?\}')
+        with open(self.templates.path(platform), 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip().replace('{topic}', topic)
+                if not line or line.startswith('@'):
+                    continue
+                # 表現パターンを含む行は、選ばれうる全ての組み合わせを定型とする
+                variants = ['']
+                position = 0
+                for match in expr_slot.finditer(line):
+                    name, override = match.groups()
+                    choices = [choice.replace('{topic}', override if override is not None else topic)
+                               for choice in self.expressions.get(name, ())]
+                    literal = line[position:match.start()]
+                    variants = [variant + literal + choice for variant in variants for choice in choices]
+                    position = match.end()
+                lines.update(variant + line[position:] for variant in variants)
+        for choices in self.expressions.values():
+            lines.update(choice.replace('{topic}', topic) for choice in choices)
+        # 展開は1行目（考えそのもの）の後ろが決まり文句
+        for expansion in (self.build_note_expansion(''), self.build_ameblo_expansion('')):
+            lines.update(expansion.split('\n')[1:])
+        return {line.strip() for line in lines if line.strip() and '{' not in line}
+    
+    @profiler.timed('check_duplicates')
+    def check_duplicates(self, filepath, topic, platform, index=None):
+        """保存した記事の段落と似ている、過去記事・他の記事の段落を探す
+        
+        同じテーマの記事（以前の版や他のプラットフォーム向けの版）と、テンプレートの定型文は除く。
+        """
+        index = index or self.get_duplicate_index()
+        # ファイル名は「テーマ_日付_時刻.md」なので、日時の前までが同じものは同じテーマの記事
+        stem = os.path.basename(filepath).rsplit('_', 2)[0]
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return index.check(f.read(), exclude=lambda path: os.path.basename(path).rsplit('_', 2)[0] == stem,
+                               boilerplate=self.boilerplate_lines(topic, platform))
+    
+    @profiler.timed('extract_archive')
+    def find_past_paragraphs(self, topic, current_thoughts, limit=2, use_archive=None):
+        """テーマに関連する過去記事の段落を (記事タイトル, セクション名, 本文) で返す"""
+        if not (self.use_archive if use_archive is None else use_archive):
+            return []
+        
+        keywords = self.get_thought_index(current_thoughts).keywords_for_topic(topic)
+        return self.get_archive().find_paragraphs(topic, keywords, limit=limit)
     
+    @profiler.timed('extract')
     def extract_relevant_thoughts(self, topic, current_thoughts):
-        """テーマに関連する考えを抽出"""
+        """テーマに関連する考えを、関連の強い順に抽出"""
         if not current_thoughts:
             return []
         
-        # テーマに関連するキーワードマッピング
-        topic_keywords = {
-            'プロテイン': ['プロテイン', '栄養', '食事', 'サプリ'],
-            '筋トレ': ['筋トレ', 'トレーニング', '頻度', '継続'],
-            '姿勢': ['猫背', '反り腰', '姿勢', '腰痛'],
-            '継続': ['継続', 'モチベーション', '楽しく'],
-            '睡眠': ['睡眠'],
-            '食事': ['食事', '栄養', 'プロテイン']
-        }
-        
-        # テーマに最も近いキーワードセットを見つける
-        relevant_keywords = []
-        for key, keywords in topic_keywords.items():
-            if key in topic or any(keyword in topic for keyword in keywords):
-                relevant_keywords.extend(keywords)
-        
-        # 関連する考えを抽出
-        relevant_thoughts = []
-        for line in current_thoughts.split('\n'):
-            if line.strip().startswith('・') and any(keyword in line for keyword in relevant_keywords):
-                relevant_thoughts.append(line.strip()[1:].strip())  # '・'を除去
+        return self.get_thought_index(current_thoughts).ranked(topic, self.FALLBACK_THOUGHTS,
+                                                                self.FALLBACK_MIN_SCORE,
+                                                                self.FALLBACK_MIN_MATCHES)
+    
+    def extract_relevant_categories(self, topic, current_thoughts):
+        """extract_relevant_thoughts が返す考えそれぞれの【カテゴリ】"""
+        if not current_thoughts:
+            return []
         
-        return relevant_thoughts
+        index = self.get_thought_index(current_thoughts)
+        return [index.categories[thought_id]
+                for thought_id in index.ranked_ids(topic, self.FALLBACK_THOUGHTS, self.FALLBACK_MIN_SCORE,
+                                                   self.FALLBACK_MIN_MATCHES)]
+    
+    def template_context(self, topic, relevant_thoughts, past_paragraphs=None):
+        """テンプレートに渡す変数"""
+        return {
+            'topic': topic,
+            'thoughts': relevant_thoughts,
+            'past_paragraphs': [{'title': title, 'section': section_name, 'text': paragraph}
+                                for title, section_name, paragraph in past_paragraphs or []]
+        }
     
-    def generate_note_article(self, topic, relevant_thoughts):
+    @profiler.timed('render')
+    def render_template(self, platform, topic, relevant_thoughts, past_paragraphs=None, rng=None):
+        """プラットフォームのテンプレートで記事を描画（rng を省略すると毎回違う表現になる）"""
+        context = self.template_context(topic, relevant_thoughts, past_paragraphs)
+        return self.templates.render(platform, context, rng or random.Random())
+    
+    def stream_template(self, platform, topic, relevant_thoughts, past_paragraphs=None, rng=None):
+        """render_template と同じ記事を、断片ごとに順に返す"""
+        context = self.template_context(topic, relevant_thoughts, past_paragraphs)
+        return profiler.iterate('render', self.templates.stream(platform, context, rng or random.Random()))
+    
+    def generate_note_article(self, topic, relevant_thoughts, past_paragraphs=None, rng=None):
         """note用記事生成（3000-5000文字）"""
-        article = []
-        
-        # タイトル
-        article.append(f"# {topic}")
-        article.append("")
-        
-        # 導入
-        article.append(random.choice(self.expressions['opening']))
-        article.append(f"今回は、{topic}について詳しくお伝えいたします。")
-        article.append("")
-        
-        # 問題提起
-        problem_intro = random.choice(self.expressions['problem_introduction']).format(topic=f"{topic}に関する悩み")
-        article.append(problem_intro)
-        
-        # よくある悩み例（テーマに応じて）
-        if 'プロテイン' in topic:
-            article.append('「プロテインって本当に必要ですか？」')
-            article.append('「どのプロテインを選べばいいかわからない」')
-            article.append('「プロテインを飲んでるけど効果を感じない」')
-        elif '筋トレ' in topic:
-            article.append('「どのくらいの頻度でやればいいですか？」')
-            article.append('「毎日やらないと意味がないですか？」')
-            article.append('「忙しくて続けられません」')
-        elif '姿勢' in topic:
-            article.append('「猫背が気になって仕方ない」')
-            article.append('「デスクワークで肩こりがひどい」')
-            article.append('「反り腰で腰が痛い」')
-        
-        article.append("")
-        article.append(random.choice(self.expressions['empathy_check']))
-        article.append("")
-        
-        # 一般的なアドバイスとバランス評価
-        article.append(random.choice(self.expressions['common_advice']))
-        if 'プロテイン' in topic:
-            article.append('「とりあえず有名なプロテインを買って飲んでください」')
-        elif '筋トレ' in topic:
-            article.append('「毎日少しずつでも続けましょう」')
-        elif '姿勢' in topic:
-            article.append('「背筋を伸ばして正しい姿勢を心がけましょう」')
-        
-        article.append("")
-        article.append(random.choice(self.expressions['balance_evaluation']))
-        article.append(random.choice(self.expressions['transition']) + "...")
-        article.append("")
-        
-        # 石原トレーナーの考え（現在の考えから抽出）
-        article.append("## 私が考える、より効果的なアプローチ")
-        article.append("")
-        
-        if relevant_thoughts:
-            for i, thought in enumerate(relevant_thoughts[:3], 1):  # 最大3つ
-                article.append(f"### {i}. {self.extract_title_from_thought(thought)}")
-                article.append("")
-                article.append(self.expand_thought_for_note(thought))
-                article.append("")
-        else:
-            # デフォルトのアドバイス
-            article.append("### 1. 個人差を理解する")
-            article.append("")
-            article.append("まず大切なのは、一人ひとりの体は違うということです。")
-            article.append("同じ方法でも効果の出方は人それぞれ。")
-            article.append("ここから推察するに、画一的なアドバイスではなく、")
-            article.append("あなたに合った方法を見つけることが重要だと思っています。")
-            article.append("")
-        
-        # 実践的なアドバイス
-        article.append("## 具体的に何から始めるか")
-        article.append("")
-        article.append("理論も大切ですが、やっぱり実践が一番です。")
-        article.append("")
-        
-        if 'プロテイン' in topic:
-            article.append("まず、現在の食事でたんぱく質がどのくらい摂れているかを確認してみてください。")
-            article.append("プロテインパウダーありきではなく、食事からの摂取も検討してみましょう。")
-            article.append("そして、継続しやすい味や形状を重視して選ぶことが大切です。")
-        elif '筋トレ' in topic:
-            article.append("まず、週1回からでも始めてみてください。完璧を求める必要はありません。")
-            article.append("楽しめる種目を見つけることから始めましょう。")
-            article.append("結果より継続することを優先してみてください。")
-        elif '姿勢' in topic:
-            article.append("まず、日常の座り方・立ち方を見直してみてください。")
-            article.append("エクササイズだけでなく、デスク環境なども整えてみましょう。")
-            article.append("完璧な姿勢より、まずは「気づく」習慣をつけることが大切です。")
-        
-        article.append("")
-        article.append(random.choice(self.expressions['experience_invitation']))
-        article.append(random.choice(self.expressions['encouragement']))
-        article.append("")
-        
-        # 締め
-        article.append("## おわりに")
-        article.append("")
-        article.append(f"{topic}について、私なりの考えをお伝えいたしました。")
-        article.append("")
-        article.append("大切なのは、正しい方法よりもあなたが続けられる方法。")
-        article.append("完璧を目指すより、継続を目指す。")
-        article.append("")
-        article.append("そんな気持ちで、一歩ずつ取り組んでいただければと思います。")
-        article.append("")
-        article.append(random.choice(self.expressions['closing']))
-        article.append(random.choice(self.expressions['continuation']))
-        article.append("")
-        article.append("---")
-        article.append("")
-        article.append("**パーソナルトレーニングにご興味のある方は、**")
-        article.append("**体験セッションからお気軽にどうぞ。**")
-        
-        return "\n".join(article)
-    
-    def generate_ameblo_article(self, topic, relevant_thoughts):
+        return self.render_template('note', topic, relevant_thoughts, past_paragraphs, rng)
+    
+    def generate_ameblo_article(self, topic, relevant_thoughts, rng=None):
         """ameblo用記事生成（1000-2000文字）"""
-        article = []
-        
-        # タイトル
-        article.append(f"# {topic}")
-        article.append("")
-        
-        # 導入（よりカジュアル）
-        article.append(random.choice(self.expressions['opening']))
-        article.append(f"今回は、{topic}についてご紹介します✨")
-        article.append("")
-        
-        # 問題提起（簡潔に）
-        problem_intro = random.choice(self.expressions['problem_introduction']).format(topic=f"{topic}の悩み")
-        article.append(problem_intro)
-        
-        if 'プロテイン' in topic:
-            article.append('「プロテインって必要？」')
-            article.append('「どれを選べばいいの？」')
-        elif '筋トレ' in topic:
-            article.append('「どのくらいやればいいの？」')
-            article.append('「続かない💦」')
-        elif '姿勢' in topic:
-            article.append('「猫背が気になる」')
-            article.append('「肩こりがひどい」')
-        
-        article.append("")
-        article.append(random.choice(self.expressions['empathy_check']))
-        article.append("")
-        
-        # 体験談・関西弁要素を入れる
-        article.append("## 私の体験談")
-        article.append("")
-        if 'プロテイン' in topic:
-            article.append("実は私も昔、プロテイン選びで迷いまくってました😅")
-            article.append("「高いやつの方がいいんかな？」って思って")
-            article.append("結局続かへんかったという...")
-        elif '筋トレ' in topic:
-            article.append("お客様に「週何回やればいいですか？」って")
-            article.append("よく聞かれるんですが、")
-            article.append("正直、毎日やらなくても全然オッケーやと思ってます！")
-        elif '姿勢' in topic:
-            article.append("デスクワークのお客様から")
-            article.append("「猫背が気になって...」って相談されること多いです")
-            article.append("でも「背筋を伸ばして」だけじゃ根本解決にならへんのよね💦")
-        
-        article.append("")
-        
-        # 石原トレーナーのアドバイス（1-2個に絞る）
-        article.append("## 私が思うポイント")
-        article.append("")
-        
-        if relevant_thoughts:
-            thought = relevant_thoughts[0]  # 最初の1つだけ使用
-            article.append(f"**{self.extract_title_from_thought(thought)}**")
-            article.append("")
-            article.append(self.expand_thought_for_ameblo(thought))
-        else:
-            article.append("**完璧を求めずに継続を優先**")
-            article.append("")
-            article.append("一番大事なのは続けること！")
-            article.append("完璧にやろうとして挫折するより、")
-            article.append("6割でも続ける方が絶対にいい結果が出ます✨")
-        
-        article.append("")
-        
-        # 具体的なアクション（簡潔に）
-        article.append("## 今日からできること")
-        article.append("")
-        
-        if 'プロテイン' in topic:
-            article.append("まずは今の食事を見直してみてください。")
-            article.append("足りない分だけプロテインで補うという考え方で十分です。")
-            article.append("続けやすい味を選ぶことも大切ですね。")
-        elif '筋トレ' in topic:
-            article.append("週1回からスタートしてみてください。")
-            article.append("楽しめる種目を見つけることから始めましょう。")
-            article.append("習慣になったら少しずつ増やしていけばいいんです。")
-        elif '姿勢' in topic:
-            article.append("座り方をちょっと意識してみてください。")
-            article.append("1時間に1回立ち上がる習慣をつけてみましょう。")
-            article.append("簡単なストレッチを取り入れてみるのもおすすめです。")
-        
-        article.append("")
-        article.append(random.choice(self.expressions['experience_invitation']))
-        article.append("")
-        
-        # 親しみやすい締め
-        article.append("一緒に頑張りましょうね〜😊")
-        article.append(random.choice(self.expressions['encouragement']))
-        article.append("")
-        article.append(random.choice(self.expressions['closing']))
-        article.append("質問があればお気軽にコメントください💪")
-        article.append("")
-        article.append("---")
-        article.append("")
-        article.append("パーソナルトレーニング体験受付中✨")
-        article.append("お気軽にDMくださいね〜")
-        
-        return "\n".join(article)
-    
-    def generate_kensuu_style_blog(self, topic, relevant_thoughts):
+        return self.render_template('ameblo', topic, relevant_thoughts, rng=rng)
+    
+    def generate_kensuu_style_blog(self, topic, relevant_thoughts, rng=None):
         """けんすうスタイル×石原トレーナーのブログ記事生成"""
-        article = []
-        
-        # タイトル
-        article.append(f"# {topic}")
-        article.append("")
-        
-        # けんすう式導入
-        article.append("こんにちは！トレーナーの石原です。")
-        article.append("")
-        article.append(f"今日は「{topic}」について書きたいと思います。")
-        
-        # 問題提起・共感
-        if 'プロテイン' in topic:
-            problem = "「プロテインって本当に必要ですか？」「どれを選べばいいかわからない」"
-            common_advice = "「とりあえず有名なプロテインを買って飲んでください」"
-        elif '筋トレ' in topic or 'トレーニング' in topic:
-            problem = "「どのくらいの頻度でやればいいですか？」「毎日やらないと意味がないですか？」"
-            common_advice = "「毎日少しずつでも続けましょう」"
-        elif '姿勢' in topic:
-            problem = "「猫背が気になって仕方ない」「デスクワークで肩こりがひどい」"
-            common_advice = "「背筋を伸ばして正しい姿勢を心がけましょう」"
-        else:
-            problem = f"「{topic}について悩んでいます」"
-            common_advice = "「頑張って継続しましょう」"
-        
-        article.append(f"最近、お客様から{problem}という相談をよく受けるんですよね。")
-        article.append("")
-        article.append("みなさんもきっと一度は言われたことがあると思うんです。")
-        
-        # 一般的なアドバイスの提示
-        article.append("")
-        article.append("## よくあるアドバイスの落とし穴")
-        article.append("")
-        article.append(f"{topic}でよく言われるのが{common_advice}というアドバイスです。")
-        article.append("")
-        article.append("これ、間違いではないんですが、ちょっと問題があるんですよね。")
-        article.append("")
-        
-        # 問題点の指摘（けんすう式）
-        if '姿勢' in topic:
-            article.append("まず、意識し続けるのがめちゃくちゃ疲れます。")
-            article.append("朝は頑張って背筋を伸ばしていても、昼過ぎには「あ、また猫背になってる...」ってなりがちです。")
-            article.append("")
-            article.append("しかも「正しい姿勢」って、実は人によって違うんです。")
-        elif 'プロテイン' in topic:
-            article.append("まず、「有名だから良い」とは限らないということです。")
-            article.append("味や値段、続けやすさは人それぞれ違いますからね。")
-            article.append("")
-            article.append("しかも、そもそも本当にプロテインが必要かどうかも、その人の食事によって変わります。")
-        elif '筋トレ' in topic:
-            article.append("まず、「毎日」というプレッシャーがしんどいです。")
-            article.append("できない日があると「今日もサボってしまった...」という罪悪感に襲われます。")
-            article.append("")
-            article.append("しかも、毎日やることが必ずしも効果的とは限らないんです。")
-        
-        article.append("")
-        article.append("骨格も筋肉のつき方も、日常の動作パターンも人それぞれ。")
-        article.append("なのに画一的なアドバイスをもらっても、根本的な解決にはならないことが多いんです。")
-        
-        # 視点の転換（けんすう式）
-        article.append("")
-        article.append(f"## {topic.replace('の', '')}が難しい本当の理由")
-        article.append("")
-        article.append("ここで少し視点を変えてみましょう。")
-        article.append("")
-        
-        if '姿勢' in topic:
-            article.append("そもそも、なぜ姿勢が悪くなるのか。")
-            article.append("多くの場合、それは「楽だから」なんです。")
-            article.append("猫背の方が、その人の体にとって楽な状態になってしまっているんですね。")
-            article.append("")
-            article.append("例えば、デスクワークで前かがみになる時間が長いと、胸の筋肉は縮んで、背中の筋肉は伸びっぱなしになります。")
-            article.append("この状態が続くと、体はその姿勢を「正常」だと思い込んでしまうんです。")
-            article.append("")
-            article.append("つまり、姿勢の問題って、実は筋肉のバランスの問題なんです。")
-        elif 'プロテイン' in topic:
-            article.append("そもそも、なぜプロテイン選びが難しいのか。")
-            article.append("それは「何のために飲むのか」が曖昧だからなんです。")
-            article.append("")
-            article.append("筋肉をつけたいのか、食事の栄養バランスを整えたいのか、それとも単純にタンパク質が足りないのか。")
-            article.append("目的によって、選ぶべきプロテインは全然違います。")
-        elif '筋トレ' in topic:
-            article.append("そもそも、なぜ筋トレが続かないのか。")
-            article.append("多くの場合、それは「完璧を求めすぎるから」なんです。")
-            article.append("")
-            article.append("毎日やらないといけない、と思うから挫折する。")
-            article.append("でも実際は、週2回でも十分効果は出るんです。")
-        
-        # とはいえ（けんすう式転換）
-        article.append("")
-        article.append("## とはいえ、○○だけの話でもない")
-        article.append("")
-        
-        if '姿勢' in topic:
-            article.append("「じゃあ筋トレすればいいのか」と思うかもしれませんが、それも半分正解で半分間違いです。")
-            article.append("")
-            article.append("確かに筋力は大切です。")
-            article.append("でも、それ以上に大切なのが「日常の動作パターン」なんですよね。")
-            article.append("")
-            article.append("どんなに筋トレを頑張っても、1日8時間のデスクワークで前かがみになっていたら、その影響の方が大きいんです。")
-            article.append("これ、ちょっと考えてみると当たり前の話ですよね。")
-        elif 'プロテイン' in topic:
-            article.append("「じゃあ食事から摂ればいいのか」と思うかもしれませんが、それも現実的には難しい場合があります。")
-            article.append("")
-            article.append("確かに食事からタンパク質を摂るのが理想です。")
-            article.append("でも、毎日肉や魚を十分な量食べるのって、意外と大変なんですよね。")
-        elif '筋トレ' in topic:
-            article.append("「じゃあ週2回だけやればいいのか」と思うかもしれませんが、それも少し違います。")
-            article.append("")
-            article.append("確かに頻度は週2回でも大丈夫です。")
-            article.append("でも、それよりも大切なのが「楽しく続けられるかどうか」なんですよね。")
-        
-        # 石原トレーナーの考え・提案
-        article.append("")
-        article.append("## 私が考える、もう少し楽なアプローチ")
-        article.append("")
-        article.append("というわけで、僕がお客様にお伝えしているアプローチは、こんな感じです。")
-        article.append("")
-        
-        if '姿勢' in topic:
-            article.append("まず「完璧な姿勢」を目指すのをやめること。")
-            article.append("代わりに「今より少し楽になる姿勢」を見つけることから始めます。")
-            article.append("")
-            article.append("具体的には、デスクの高さやモニターの位置を調整する。")
-            article.append("椅子を変える。")
-            article.append("1時間に1回は立ち上がる習慣をつける。")
-            article.append("こういう小さな変化から始めるんです。")
-        elif 'プロテイン' in topic:
-            article.append("まず「プロテインありき」で考えるのをやめること。")
-            article.append("代わりに「今の食事で足りないタンパク質を補う」という考え方から始めます。")
-            article.append("")
-            article.append("具体的には、現在の食事でどのくらいタンパク質が摂れているかを確認する。")
-            article.append("足りない分だけプロテインで補う。")
-            article.append("続けやすい味や価格のものを選ぶ。")
-            article.append("こんな感じで現実的に考えるんです。")
-        elif '筋トレ' in topic:
-            article.append("まず「毎日やらないといけない」という思い込みをやめること。")
-            article.append("代わりに「週1回でもいいから続ける」ことから始めます。")
-            article.append("")
-            article.append("具体的には、楽しめる種目を見つける。")
-            article.append("短時間でもいいから習慣にする。")
-            article.append("結果より継続を重視する。")
-            article.append("こういう考え方で取り組むんです。")
-        
-        # 実践的なアドバイス
-        article.append("")
-        article.append("そして、ストレッチやエクササイズは「○○を正す」ためではなく「体を動かしやすくする」ために行います。")
-        article.append("硬くなった筋肉をほぐして、使えていない筋肉を動かす。")
-        article.append("それだけで、自然と楽な状態が変わってくるんです。")
-        
-        # 気持ちの持ち方
-        article.append("")
-        article.append("## 気持ちの持ち方も大切")
-        article.append("")
-        article.append("最後に、これは僕の個人的な考えなんですが、一番大切なのは「自分を責めないこと」だと思っています。")
-        article.append("")
-        
-        if '姿勢' in topic:
-            article.append("「また猫背になってる」って気づいた時に、自分を責める必要はありません。")
-            article.append("むしろ「気づけた自分、えらい！」って思ってもらいたいんです。")
-        elif 'プロテイン' in topic:
-            article.append("「今日もプロテイン飲み忘れた」って時に、自分を責める必要はありません。")
-            article.append("むしろ「明日から気をつけよう」って思ってもらいたいんです。")
-        elif '筋トレ' in topic:
-            article.append("「今週も筋トレできなかった」って時に、自分を責める必要はありません。")
-            article.append("むしろ「来週は1回でもやってみよう」って思ってもらいたいんです。")
-        
-        article.append("")
-        article.append("気づくことができれば、少しずつ変えていくことができます。")
-        
-        # ゆるやかなまとめ（けんすう式）
-        article.append("")
-        article.append("## というわけで")
-        article.append("")
-        
-        if '姿勢' in topic:
-            article.append("姿勢改善は「背筋を伸ばす」ことではなく「体が楽になる環境を作ること」から始めてみてください。")
-        elif 'プロテイン' in topic:
-            article.append("プロテイン選びは「有名な商品を買う」ことではなく「自分に必要な分を見極めること」から始めてみてください。")
-        elif '筋トレ' in topic:
-            article.append("筋トレは「毎日やる」ことではなく「楽しく続けられる方法を見つけること」から始めてみてください。")
-        else:
-            article.append(f"{topic}は「完璧にやる」ことではなく「続けやすい方法を見つけること」から始めてみてください。")
-        
-        article.append("")
-        article.append("完璧を目指さず、今より少しだけ楽になることを目標にする。")
-        article.append("")
-        article.append("そんな気持ちで取り組んでもらえたら、きっと続けやすいし、結果的に良い変化が生まれると思います。")
-        
-        return "\n".join(article)
+        return self.render_template('blog', topic, relevant_thoughts, rng=rng)
     
     def extract_title_from_thought(self, thought):
         """考えからタイトルを抽出"""
@@ -554,73 +388,33 @@ class IshiharaArticleGenerator:
         else:
             return "大切なポイント"
     
+    @profiler.timed('clean')
     def clean_raw_thought(self, thought):
         """メモの断片を意味のある文章に変換"""
-        # 関西弁の語尾「やな」を標準語に変換
-        thought = re.sub(r'やな$', 'ですね', thought)
-        thought = re.sub(r'やと', 'だと', thought)
-        thought = re.sub(r'かな$', 'でしょうか', thought)
-        thought = re.sub(r'やし', 'し', thought)
-        thought = re.sub(r'へん', 'ない', thought)
-        
-        # 断片的なメモを完全な文章に変換
-        conversions = {
-            "お客様から「プロテイン美味しくて続けられる」と言われた": 
-                "プロテインは美味しさと継続しやすさが重要だということを、お客様の声から実感しています。",
-            "やっぱりプロテインは必要だと思います": 
-                "適切なタンパク質摂取のために、プロテインは必要な栄養補助だと考えています。",
-            "筋トレ頻度について質問された": 
-                "筋トレの頻度については、週2回程度でも十分な効果が期待できると考えています。",
-            "毎日やらなくても週2回で十分って伝えた": 
-                "毎日トレーニングしなくても、週2回の継続的な実践で十分な効果が得られます。",
-            "継続が一番大事": 
-                "何よりも大切なのは、無理のない範囲で継続することです。",
-            "お客様が「楽しくなってきた」って言ってくれた": 
-                "トレーニングを楽しいと感じていただけることが、継続の秘訣だと実感しています。",
-            "楽しさが継続の秘訣だと改めて実感": 
-                "楽しく取り組めることが、長期継続の最も重要な要素だと考えています。",
-            "反り腰の改善について相談された": 
-                "反り腰の改善には、股関節の可動域向上など根本的なアプローチが必要です。",
-            "よくある「背筋を伸ばしましょう」じゃ根本解決にならない": 
-                "「背筋を伸ばす」だけでは表面的な対処に留まり、根本的な解決には至りません。",
-            "股関節の可動域から見直しが必要": 
-                "姿勢改善には、股関節の可動域など体の土台から見直すことが重要です。",
-            "猫背改善のエクササイズを教えた": 
-                "猫背改善には適切なエクササイズが有効ですが、日常の姿勢習慣も重要です。",
-            "でも根本は座り方とか日常の姿勢": 
-                "エクササイズも大切ですが、根本的には日常の座り方や立ち方を見直すことが重要です。",
-            "エクササイズだけじゃ限界がある": 
-                "エクササイズだけでなく、日常生活の姿勢習慣を見直すことが根本的な改善につながります。",
-            "プロテインパウダーが苦手なお客様": 
-                "プロテインパウダーが苦手な方には、食事からのタンパク質摂取をお勧めしています。",
-            "食事から摂取する方法も提案した": 
-                "サプリメントに頼らず、普段の食事からタンパク質を摂取する方法も有効です。",
-            "無理にサプリに頼らなくてもいい": 
-                "サプリメントありきではなく、まずは食事からの栄養摂取を基本に考えています。"
-        }
-        
-        # 完全一致する変換があれば使用
-        if thought in conversions:
-            return conversions[thought]
-        
-        # 部分的な変換処理
-        for key, value in conversions.items():
-            if key in thought:
-                return value
-        
-        # 語尾調整
-        if not thought.endswith(('。', '！', '？', 'です', 'ます', 'でしょう')):
-            if 'だと思う' in thought or '考え' in thought:
-                thought += "と考えています。"
-            elif '必要' in thought or '大切' in thought:
-                thought += "だと思います。"
+        return self.normalizer.normalize(thought)
+    
+    def expand_thought(self, thought, platform):
+        """考えをプラットフォーム向けに展開（同じ考え・同じルールなら前回の結果を使い回す）"""
+        key = (thought, platform, self.normalizer.version)
+        expanded = self.expansion_cache.get(key)
+        if expanded is None:
+            if platform == 'note':
+                expanded = self.build_note_expansion(thought)
             else:
-                thought += "。"
-        
-        return thought
+                expanded = self.build_ameblo_expansion(thought)
+            self.expansion_cache.put(key, expanded)
+        return expanded
     
     def expand_thought_for_note(self, thought):
         """note用に考えを詳しく展開"""
+        return self.expand_thought(thought, 'note')
+    
+    def expand_thought_for_ameblo(self, thought):
+        """ameblo用に考えをカジュアルに展開"""
+        return self.expand_thought(thought, 'ameblo')
+    
+    def build_note_expansion(self, thought):
+        """note用に考えを詳しく展開（キャッシュなし）"""
         # メモの断片的な部分を削除し、意味のある内容に変換
         clean_thought = self.clean_raw_thought(thought)
         
@@ -636,8 +430,8 @@ class IshiharaArticleGenerator:
         
         return "\n".join(expanded)
     
-    def expand_thought_for_ameblo(self, thought):
-        """ameblo用に考えをカジュアルに展開"""
+    def build_ameblo_expansion(self, thought):
+        """ameblo用に考えをカジュアルに展開（キャッシュなし）"""
         # メモの断片的な部分を削除し、意味のある内容に変換
         clean_thought = self.clean_raw_thought(thought)
         
@@ -650,8 +444,9 @@ class IshiharaArticleGenerator:
         
         return "\n".join(expanded)
     
+    @profiler.timed('save')
     def save_article(self, content, topic, platform):
-        """記事をファイルに保存"""
+        """記事をファイルに保存（一時ファイルに書いてから置き換える）"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         safe_topic = re.sub(r'[^\w\s-]', '', topic).strip()
         safe_topic = re.sub(r'[\s]+', '_', safe_topic)
@@ -664,40 +459,63 @@ class IshiharaArticleGenerator:
         
         filepath = os.path.join(platform_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # content は文字列でも、描画しながら返される断片の並びでもよい
+        char_count = atomic_write(filepath, content)
         
-        return filepath, len(content)
+        return filepath, char_count
     
-    def generate(self, topic, platform):
+    def save_caches(self):
+        """実行をまたいで使うキャッシュを保存"""
+        if self.persist_cache:
+            self.expansion_cache.save(self.expansion_cache_file)
+    
+    def article_seed(self, seed, topic, platform):
+        """記事ごとの乱数シード（テーマとプラットフォームの組から決定的に導出）"""
+        return f"{seed}:{platform}:{topic}"
+    
+    def article_rng(self, seed, topic, platform):
+        """記事ごとの乱数生成器（シード指定時は実行順やプロセスに関係なく同じ記事になる）"""
+        if seed is None:
+            return random.Random()
+        return random.Random(self.article_seed(seed, topic, platform))
+    
+    def render_article(self, topic, platform, relevant_thoughts, seed=None, past_paragraphs=None):
+        """プラットフォーム別に記事本文を生成"""
+        if platform not in self.PLATFORMS:
+            return None
+        return self.render_template(platform, topic, relevant_thoughts, past_paragraphs,
+                                    self.article_rng(seed, topic, platform))
+    
+    def stream_article(self, topic, platform, relevant_thoughts, seed=None, past_paragraphs=None):
+        """render_article と同じ記事を、書き込みながら描画できるよう断片ごとに返す"""
+        if platform not in self.PLATFORMS:
+            return None
+        return self.stream_template(platform, topic, relevant_thoughts, past_paragraphs,
+                                    self.article_rng(seed, topic, platform))
+    
+    @profiler.timed('output_cache_key')
+    def article_key(self, topic, platform, relevant_thoughts, past_paragraphs, seed, style_guide):
+        """記事の入力（テーマ・考え・スタイルガイド・シード・テンプレートなど）のハッシュ"""
+        return content_key(topic, platform, relevant_thoughts, past_paragraphs, seed,
+                           hashlib.sha256(style_guide.encode('utf-8')).hexdigest(),
+                           self.templates.digest(platform), self.normalizer.version,
+                           self.expressions)
+    
+    def generate(self, topic, platform, seed=None, force=False):
         """記事生成のメイン処理"""
-        if platform not in ['note', 'ameblo', 'blog']:
-            print("エラー: プラットフォームは 'note', 'ameblo', または 'blog' を指定してください")
+        if platform not in self.PLATFORMS:
+            print(f"エラー: プラットフォームは {', '.join(repr(name) for name in self.PLATFORMS)} のいずれかを指定してください")
             return
         
         print(f"{platform}用の記事「{topic}」を生成中...")
         
-        # スタイルガイドと現在の考えを読み込み
-        style_guide = self.load_style_guide()
-        current_thoughts = self.load_current_thoughts()
-        
-        # テーマに関連する考えを抽出
-        relevant_thoughts = self.extract_relevant_thoughts(topic, current_thoughts)
-        
-        # プラットフォーム別に記事生成
-        if platform == 'note':
-            content = self.generate_note_article(topic, relevant_thoughts)
-        elif platform == 'ameblo':
-            content = self.generate_ameblo_article(topic, relevant_thoughts)
-        elif platform == 'blog':
-            content = self.generate_kensuu_style_blog(topic, relevant_thoughts)
-        else:
-            print(f"エラー: 不明なプラットフォーム '{platform}'")
+        filepath, char_count, reused, relevant_thoughts = self.build_article(topic, platform, seed, force)
+        if reused:
+            print(f"入力に変更がないため、生成済みの記事を使います: {filepath}")
+            print(f"文字数: {char_count}文字")
+            print("作り直す場合は --force を指定してください")
             return
         
-        # 保存
-        filepath, char_count = self.save_article(content, topic, platform)
-        
         print(f"記事を生成しました: {filepath}")
         print(f"文字数: {char_count}文字")
         print("石原トレーナーらしさ: 反映済み")
@@ -705,20 +523,353 @@ class IshiharaArticleGenerator:
             print("最新の考え: 反映済み")
         else:
             print("最新の考え: デフォルトアドバイスを使用")
+        
+        started = time.perf_counter()
+        overlaps = self.check_duplicates(filepath, topic, platform)
+        elapsed = (time.perf_counter() - started) * 1000
+        if overlaps:
+            print(f"既存の文章と似ている段落: {len(overlaps)}件（{elapsed:.1f}ミリ秒で確認）")
+            print_overlaps(overlaps)
+        else:
+            print(f"既存の文章との重複: なし（{elapsed:.1f}ミリ秒で確認）")
+    
+    def build_article(self, topic, platform, seed=None, force=False):
+        """記事を1件生成して保存し、(パス, 文字数, 生成済みを使ったか, 関連する考え) を返す"""
+        # スタイルガイドと現在の考えを読み込み
+        style_guide = self.load_style_guide()
+        current_thoughts = self.load_current_thoughts()
+        
+        # テーマに関連する考えと過去記事の段落を抽出
+        relevant_thoughts = self.extract_relevant_thoughts(topic, current_thoughts)
+        past_paragraphs = self.find_past_paragraphs(topic, current_thoughts)
+        task = (topic, platform, relevant_thoughts, seed, past_paragraphs)
+        
+        # 入力が同じ記事を生成済みなら、描画も保存もせずにそのファイルを使う
+        key = self.article_key(topic, platform, relevant_thoughts, past_paragraphs, seed, style_guide)
+        existing = None if force else self.output_store.lookup(key)
+        if existing:
+            filepath, char_count = existing
+            self.record_build(task, current_thoughts, key, filepath, char_count)
+            self.save_build_records()
+            return filepath, char_count, True, relevant_thoughts
+        
+        # 保存（描画しながらファイルに書き出す）
+        filepath, char_count = self.save_article(self.stream_article(*task), topic, platform)
+        self.record_build(task, current_thoughts, key, filepath, char_count)
+        self.save_build_records()
+        
+        self.save_caches()
+        
+        return filepath, char_count, False, relevant_thoughts
+    
+    def load_manifest(self, manifest_path):
+        """マニフェスト（CSV または JSONL）からテーマとプラットフォームの組を読み込み"""
+        if not os.path.exists(manifest_path):
+            print(f"エラー: {manifest_path} が見つかりません")
+            return []
+        
+        records = []    # (行番号, レコード)
+        # Excelで保存したCSVの先頭に付くBOMは読み飛ばす（付いたままだとヘッダーが一致しない）
+        with open(manifest_path, 'r', encoding='utf-8-sig', newline='') as f:
+            if manifest_path.endswith('.jsonl'):
+                # 1行1レコード: {"topic": "...", "platform": "..."}
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        print(f"警告: {manifest_path} の{line_no}行目を読み飛ばしました（JSONとして読めません: {e.msg}）")
+                        continue
+                    if not isinstance(record, dict):
+                        print(f"警告: {manifest_path} の{line_no}行目を読み飛ばしました（オブジェクトではありません）")
+                        continue
+                    records.append((line_no, record))
+            else:
+                # ヘッダー行 "topic,platform" 付きのCSV
+                reader = csv.DictReader(f)
+                for record in reader:
+                    records.append((reader.line_num, record))
+        
+        jobs = []
+        for line_no, record in records:
+            topic = record.get('topic')
+            platform = record.get('platform')
+            topic = topic.strip() if isinstance(topic, str) else ''
+            platform = platform.strip() if isinstance(platform, str) else ''
+            if not topic or platform not in self.PLATFORMS:
+                print(f"警告: {manifest_path} の{line_no}行目を読み飛ばしました（topic={topic!r}, platform={platform!r}）")
+                continue
+            jobs.append((topic, platform))
+        
+        return jobs
+    
+    def write_article(self, task):
+        """バッチの1件を描画しながら保存し、(パス, 文字数) を返す"""
+        topic, platform = task[:2]
+        return self.save_article(self.stream_article(*task), topic, platform)
+    
+    def record_build(self, task, current_thoughts, key, filepath, char_count, use_archive=None):
+        """生成した記事を、出力の索引と依存グラフに登録"""
+        topic, platform, relevant_thoughts, seed = task[:4]
+        self.output_store.record(key, filepath, char_count, topic, platform)
+        self.build_graph.record(topic, platform, seed,
+                                self.use_archive if use_archive is None else use_archive,
+                                relevant_thoughts, self.extract_relevant_categories(topic, current_thoughts),
+                                key, os.path.relpath(filepath, self.base_dir))
+    
+    def save_build_records(self):
+        self.output_store.save()
+        self.build_graph.save()
+    
+    def write_articles(self, tasks, keys, workers=1, force=False):
+        """記事をまとめて保存し、(キー -> (パス, 文字数), 生成済みを使ったキー) を返す
+        
+        入力が同じ記事は生成済みのものを使い、残りだけを（同じ入力は1回だけ）描画する。
+        workers > 1 の時は、各ワーカーが描画した記事をそのまま atomic_write で書き出す
+        （親プロセスに本文は戻さない）。書き出す順番は決まらないが、記事の中身は記事ごとの
+        シードだけで決まり、書き出し先はテーマとプラットフォームの組ごとに別なので、結果は実行順や並列数によらない。
+        索引と依存グラフへの登録・結果の表示は、親プロセスがマニフェストの順番で行う。
+        """
+        saved = {}
+        reused = set()
+        for key in keys:
+            if key not in saved and not force:
+                existing = self.output_store.lookup(key)
+                if existing:
+                    saved[key] = existing
+                    reused.add(key)
+        pending = {}
+        for key, task in zip(keys, tasks):
+            if key not in saved:
+                pending.setdefault(key, task)
+        
+        # 各ワーカーが描画しながらそのままファイルに書き出し、結果は (パス, 文字数) だけ受け取る
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(self.base_dir, self.persist_cache)) as executor:
+                written = list(executor.map(_write_task, pending.values(),
+                                            chunksize=max(1, len(pending) // (workers * 4))))
+        else:
+            written = [self.write_article(task) for task in pending.values()]
+        saved.update(zip(pending, written))
+        
+        return saved, reused
+    
+    def generate_batch(self, jobs, workers=1, seed=None, force=False, check_duplicates=False):
+        """複数の記事をまとめて生成（入力の読み込みと考えの抽出は1回だけ）"""
+        started = time.perf_counter()
+        
+        # スタイルガイドと現在の考えはバッチ全体で1回だけ読み込む
+        style_guide = self.load_style_guide()
+        current_thoughts = self.load_current_thoughts()
+        
+        # 同じテーマの抽出結果はプラットフォーム間で使い回す
+        inputs_by_topic = {}
+        tasks = []
+        for topic, platform in jobs:
+            if topic not in inputs_by_topic:
+                inputs_by_topic[topic] = (self.extract_relevant_thoughts(topic, current_thoughts),
+                                          self.find_past_paragraphs(topic, current_thoughts))
+            relevant_thoughts, past_paragraphs = inputs_by_topic[topic]
+            tasks.append((topic, platform, relevant_thoughts, seed, past_paragraphs))
+        
+        keys = [self.article_key(topic, platform, relevant_thoughts, past_paragraphs, seed, style_guide)
+                for topic, platform, relevant_thoughts, seed, past_paragraphs in tasks]
+        saved, reused = self.write_articles(tasks, keys, workers, force)
+        for key, task in zip(keys, tasks):
+            self.record_build(task, current_thoughts, key, *saved[key])
+        self.save_build_records()
+        
+        # 結果はマニフェストの順番で表示する
+        results = []
+        for key, (topic, platform, *_) in zip(keys, tasks):
+            filepath, char_count = saved[key]
+            results.append((filepath, char_count))
+            note = "、生成済み" if key in reused else ""
+            print(f"  {platform}: {filepath}（{char_count}文字{note}）")
+        
+        self.save_caches()
+        
+        elapsed = time.perf_counter() - started
+        throughput = len(results) / elapsed if elapsed > 0 else float('inf')
+        print(f"{len(results)}件の記事を{elapsed:.2f}秒で生成しました（{throughput:.1f}件/秒）")
+        if reused:
+            print(f"入力に変更がない{len(reused)}件は生成済みの記事を使いました（作り直す場合は --force）")
+        if workers <= 1:
+            stats = self.expansion_cache.stats()
+            print(f"展開キャッシュ: ヒット{stats['hits']}件 / ミス{stats['misses']}件（ヒット率{stats['hit_rate']:.0%}）")
+        
+        if check_duplicates:
+            written = {key: task for key, task in zip(keys, tasks) if key not in reused}
+            self.report_duplicates([(saved[key][0], topic, platform) for key, (topic, platform, *_) in written.items()])
+        
+        return results
+    
+    def report_duplicates(self, articles):
+        """新しく書いた記事（パス, テーマ, プラットフォーム）それぞれについて、既存の文章と似ている段落を表示"""
+        started = time.perf_counter()
+        # 索引の更新は1回だけ（今回書いた記事も取り込むので、記事どうしの重複も見つかる）
+        index = self.get_duplicate_index()
+        found = 0
+        for filepath, topic, platform in articles:
+            overlaps = self.check_duplicates(filepath, topic, platform, index)
+            if overlaps:
+                found += 1
+                print(f"  {filepath}: 似ている段落{len(overlaps)}件")
+                print_overlaps(overlaps, indent="    ")
+        elapsed = time.perf_counter() - started
+        print(f"重複の確認: {len(articles)}件中{found}件に既存の文章と似ている段落があります（{elapsed:.2f}秒）")
+        return found
+
+    def rebuild(self, workers=1, force=False):
+        """依存グラフに記録した記事のうち、使う考えなどの入力が変わったものだけを作り直す"""
+        started = time.perf_counter()
+        
+        entries = list(self.build_graph.articles().values())
+        if not entries:
+            print("記録された記事がありません（先に記事を生成してください）")
+            return []
+        
+        style_guide = self.load_style_guide()
+        current_thoughts = self.load_current_thoughts()
+        
+        # 記事ごとに入力を計算し直し、記録したキーと違うものだけを作り直す
+        stale = []
+        for entry in entries:
+            topic, platform, seed = entry['topic'], entry['platform'], entry['seed']
+            if platform not in self.PLATFORMS:
+                print(f"警告: {platform} のテンプレートがないため「{topic}」を読み飛ばしました")
+                continue
+            relevant_thoughts = self.extract_relevant_thoughts(topic, current_thoughts)
+            past_paragraphs = self.find_past_paragraphs(topic, current_thoughts, use_archive=entry['archive'])
+            key = self.article_key(topic, platform, relevant_thoughts, past_paragraphs, seed, style_guide)
+            
+            added, removed, categories = self.build_graph.diff_thoughts(
+                entry, relevant_thoughts, self.extract_relevant_categories(topic, current_thoughts))
+            if force:
+                reason = "--force"
+            elif added or removed:
+                reason = f"考え +{added}行 / -{removed}行"
+                if categories:
+                    reason += f"（{'・'.join(categories)}）"
+            elif key != entry['key']:
+                reason = "スタイルガイド・テンプレートなどの変更"
+            elif not self.output_store.lookup(key):
+                reason = "ファイルがない"
+            else:
+                continue
+            stale.append(((topic, platform, relevant_thoughts, seed, past_paragraphs), key, entry['archive'], reason))
+        
+        if not stale:
+            print(f"{len(entries)}件の記事はすべて最新です")
+            return []
+        
+        tasks = [task for task, *_ in stale]
+        keys = [key for _, key, *_ in stale]
+        saved, reused = self.write_articles(tasks, keys, workers, force=True)
+        
+        results = []
+        for task, key, use_archive, reason in stale:
+            topic, platform = task[:2]
+            filepath, char_count = saved[key]
+            self.record_build(task, current_thoughts, key, filepath, char_count, use_archive=use_archive)
+            results.append((filepath, char_count))
+            print(f"  {platform}: {filepath}（{char_count}文字、{reason}）")
+        self.save_build_records()
+        self.save_caches()
+        
+        elapsed = time.perf_counter() - started
+        print(f"{len(entries)}件中{len(results)}件の記事を{elapsed:.2f}秒で作り直しました")
+        
+        return results
+
+# プロセスプールの各ワーカーが保持するジェネレーター
+_worker_generator = None
+
+def _init_worker(base_dir, persist_cache):
+    """ワーカープロセスの初期化（保存済みの展開キャッシュは読み込むだけ）"""
+    global _worker_generator
+    _worker_generator = IshiharaArticleGenerator(base_dir)
+    if persist_cache:
+        _worker_generator.expansion_cache.load(_worker_generator.expansion_cache_file)
+
+def _write_task(task):
+    """ワーカープロセスで1件の記事を描画して保存"""
+    return _worker_generator.write_article(task)
+
+def print_usage():
+    print("使用方法: python generate.py <テーマ> <プラットフォーム> [--seed SEED | --deterministic] [--with-archive] [--persist-cache] [--force]")
+    print("        python generate.py --batch <マニフェスト(.csv / .jsonl)> [--jobs N] [--seed SEED | --deterministic] [--with-archive] [--persist-cache] [--force]")
+    print("入力（テーマ・考え・スタイルガイド・シードなど）が前回と同じ記事は作り直さず、生成済みのファイルを使います。--force で作り直します")
+    print("例: python generate.py \"プロテインの選び方\" note")
+    print("例: python generate.py \"筋トレ継続のコツ\" ameblo")
+    print("例: python generate.py \"姿勢改善の考え方\" blog")
+    print("        python generate.py --rebuild [--jobs N] [--force]")
+    print("--seed を指定すると、同じ入力からは実行順や並列数に関係なく同じ記事になります（--deterministic は既定のシードを使う）")
+    print("例: python generate.py --batch topics.csv --jobs 4 --seed 2025")
+    print("例: python generate.py --rebuild --jobs 4   # 考えが変わった記事だけを作り直す")
+    print("単体の生成では、段落が過去記事・生成済みの記事と似ていないかを確認します（バッチでは --check-duplicates で確認）")
+    print("--db PATH を付けると、現在の考えを current-thoughts.txt ではなく organize.py --db で保存したSQLiteから読みます")
+    print("--profile（または環境変数 ISHIHARA_PROFILE=1）で段階ごとの処理時間を表示し、--profile-dir DIR でトレースなどを書き出します")
 
 def main():
-    if len(sys.argv) < 3:
-        print("使用方法: python generate.py <テーマ> <プラットフォーム>")
-        print("例: python generate.py \"プロテインの選び方\" note")
-        print("例: python generate.py \"筋トレ継続のコツ\" ameblo")
-        print("例: python generate.py \"姿勢改善の考え方\" blog")
-        sys.exit(1)
-    
-    topic = sys.argv[1]
-    platform = sys.argv[2]
-    
-    generator = IshiharaArticleGenerator()
-    generator.generate(topic, platform)
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('topic', nargs='?')
+    parser.add_argument('platform', nargs='?')
+    parser.add_argument('--batch', metavar='MANIFEST')
+    parser.add_argument('--rebuild', action='store_true')
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--seed')
+    parser.add_argument('--deterministic', action='store_true')
+    parser.add_argument('--with-archive', action='store_true')
+    parser.add_argument('--persist-cache', action='store_true')
+    parser.add_argument('--db')
+    parser.add_argument('--force', action='store_true')
+    parser.add_argument('--check-duplicates', action='store_true')
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--profile-dir')
+    parser.add_argument('-h', '--help', action='store_true')
+    args = parser.parse_args()
+    
+    if args.help or not (args.batch or args.rebuild or args.platform):
+        print_usage()
+        sys.exit(0 if args.help else 1)
+    
+    # --deterministic はシード未指定でも既定のシードを使い、同じ入力から同じ記事を作る
+    if args.seed is None and args.deterministic:
+        args.seed = DEFAULT_SEED
+    
+    start_from_options(args.profile, args.profile_dir)
+    try:
+        run(args)
+    finally:
+        profiler.finish()
+
+def run(args):
+    """コマンドラインの指定に従って記事を生成"""
+    generator = IshiharaArticleGenerator(use_archive=args.with_archive, persist_cache=args.persist_cache,
+                                         db_file=args.db)
+    
+    # --jobs 0 はCPUコア数ぶん並列化
+    workers = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if profiler.enabled and workers > 1:
+        print("注意: --jobs 2以上では、ワーカープロセス内の描画と保存は計測に含まれません")
+    
+    if args.rebuild:
+        generator.rebuild(workers=workers, force=args.force)
+        return
+    
+    if args.batch:
+        jobs = generator.load_manifest(args.batch)
+        if not jobs:
+            print("生成する記事がありません")
+            sys.exit(1)
+        generator.generate_batch(jobs, workers=workers, seed=args.seed, force=args.force,
+                                 check_duplicates=args.check_duplicates)
+        return
+    
+    generator.generate(args.topic, args.platform, seed=args.seed, force=args.force)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
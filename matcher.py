@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import deque
+
+class KeywordMatcher:
+    """複数のキーワードを1回の走査で検出するAho–Corasickオートマトン"""
+    
+    def __init__(self, keywords):
+        # keywords: キーワード -> 値 の辞書（リストの場合はキーワード自身が値）
+        if not isinstance(keywords, dict):
+            keywords = {keyword: keyword for keyword in keywords}
+        
+        self.keywords = keywords
+        self._goto = [{}]       # 状態 -> {文字: 次の状態}
+        self._fail = [0]        # 状態 -> 失敗時の遷移先
+        self._output = [()]     # 状態 -> その状態で一致するキーワードの値
+        self._alphabet = set()  # キーワードに現れる文字（それ以外の文字では必ず初期状態に戻る）
+        
+        # キーワードのトライ木を構築
+        for keyword, value in keywords.items():
+            if not keyword:
+                continue
+            state = 0
+            self._alphabet.update(keyword)
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (value,)
+        
+        # 幅優先で失敗遷移を張り、一致結果を失敗先から引き継ぐ
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output[next_state] += self._output[fail]
+    
+    def find(self, text):
+        """テキストに含まれるキーワードの値の集合を返す"""
+        goto, fail, output, alphabet = self._goto, self._fail, self._output, self._alphabet
+        found = set()
+        state = 0
+        for char in text:
+            if char not in alphabet:
+                state = 0
+                continue
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import json
+import hashlib
+from functools import lru_cache
+
+from matcher import KeywordMatcher
+
+class ThoughtNormalizer:
+    """メモの断片を記事用の文章に整える変換ルール（normalize-rules.jsonから1回だけ構築）"""
+    
+    def __init__(self, rules_file, cache_size=4096):
+        with open(rules_file, 'rb') as f:
+            data = f.read()
+        rules = json.loads(data.decode('utf-8'))
+        
+        # ルールの内容が変われば別のバージョンとして扱う（キャッシュのキーに使う）
+        self.version = hashlib.sha256(data).hexdigest()[:16]
+        
+        # 関西弁の言い換えは1つの正規表現にまとめ、一致したルールの置換先を引く
+        self._dialect_replacements = {}
+        alternatives = []
+        for rule_id, rule in enumerate(rules.get('dialect', [])):
+            name = f"r{rule_id}"
+            pattern = re.escape(rule['pattern']) + ('$' if rule.get('at_end') else '')
+            alternatives.append(f"(?P<{name}>{pattern})")
+            self._dialect_replacements[name] = rule['replacement']
+        self._dialect = re.compile('|'.join(alternatives)) if alternatives else None
+        
+        # 断片 -> 文章の変換表（部分一致は表の先頭に近いものを優先）
+        self.conversions = rules.get('conversions', {})
+        self._replacements = list(self.conversions.values())
+        self._conversion_matcher = KeywordMatcher({key: rank for rank, key in enumerate(self.conversions)})
+        
+        # 同じメモは何度変換しても同じ結果になるのでメモ化する
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+    
+    def _replace_dialect(self, match):
+        return self._dialect_replacements[match.lastgroup]
+    
+    def _normalize(self, thought):
+        """メモの断片を意味のある文章に変換"""
+        # 関西弁の語尾などを標準語に変換
+        if self._dialect is not None:
+            thought = self._dialect.sub(self._replace_dialect, thought)
+        
+        # 完全一致する変換があれば使用
+        if thought in self.conversions:
+            return self.conversions[thought]
+        
+        # 部分的な変換処理
+        ranks = self._conversion_matcher.find(thought)
+        if ranks:
+            return self._replacements[min(ranks)]
+        
+        # 語尾調整
+        if not thought.endswith(('。', '！', '？', 'です', 'ます', 'でしょう')):
+            if 'だと思う' in thought or '考え' in thought:
+                thought += "と考えています。"
+            elif '必要' in thought or '大切' in thought:
+                thought += "だと思います。"
+            else:
+                thought += "。"
+        
+        return thought
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""メモ・カテゴリ・現在の考え・考えの変化履歴を1つのSQLiteファイルに保存するストア
+
+organize.py / generate.py に --db PATH を付けると、テキストファイルを解析する代わりに
+このデータベースを引く。raw-notes.txt・current-thoughts.txt・evolution-log.txt は
+取り込みと書き出しの形式として使う。
+
+使用方法: python notes_db.py --db notes.sqlite3 import [--base-dir DIR]
+        python notes_db.py --db notes.sqlite3 export [--base-dir DIR]
+        python notes_db.py --db notes.sqlite3 notes [--category C] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+        python notes_db.py --db notes.sqlite3 evolution [--category C] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+from datetime import datetime
+
+from thought_index import iter_thoughts
+from evolution_store import EvolutionStore, parse_text_log, render_text_log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_category_date ON notes(category_id, date, seq);
+CREATE INDEX IF NOT EXISTS notes_date ON notes(date);
+CREATE TABLE IF NOT EXISTS thoughts (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS evolution (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    previous TEXT NOT NULL,
+    current TEXT NOT NULL,
+    change_type TEXT NOT NULL,
+    recorded_at TEXT,
+    UNIQUE (date, category_id, previous, current)
+);
+CREATE INDEX IF NOT EXISTS evolution_category_date ON evolution(category_id, date);
+CREATE INDEX IF NOT EXISTS evolution_date ON evolution(date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+THOUGHTS_TITLE = "=== 石原トレーナーの現在の考え・哲学 ==="
+
+class NotesView:
+    """データベースのメモを、organize.py の各段階から NoteTable と同じ読み方で引く"""
+    
+    def __init__(self, db):
+        self.db = db
+        # カテゴリは入力の中で最初に出てきた順
+        rows = db.connection.execute(
+            "SELECT c.id, c.name FROM notes n JOIN categories c ON c.id = n.category_id "
+            "GROUP BY n.category_id ORDER BY MIN(n.seq)").fetchall()
+        self._category_ids = [category_id for category_id, _ in rows]
+        self.category_names = [name for _, name in rows]
+    
+    def __len__(self):
+        return self.db.connection.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+    
+    def dated_texts_oldest_first(self, category_id):
+        """カテゴリのメモを (日付, 本文) で、古い日付から（同じ日付は入力の順番で）返す"""
+        return self.db.connection.execute(
+            "SELECT date, text FROM notes WHERE category_id = ? ORDER BY date, seq",
+            (self._category_ids[category_id],)).fetchall()
+
+class NotesDatabase:
+    """メモ・現在の考え・変化履歴のSQLiteストア（日付とカテゴリに索引を持つ）"""
+    
+    def __init__(self, path):
+        self.path = path
+        # server.py ではロックで1件ずつ処理するので、待ち受けのスレッドから使ってよい
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+        self._category_ids = dict(self.connection.execute("SELECT name, id FROM categories"))
+    
+    def close(self):
+        self.connection.close()
+    
+    def category_id(self, name):
+        """カテゴリの番号（初めてのカテゴリは登録する）"""
+        category_id = self._category_ids.get(name)
+        if category_id is None:
+            cursor = self.connection.execute("INSERT INTO categories (name) VALUES (?)", (name,))
+            category_id = self._category_ids[name] = cursor.lastrowid
+        return category_id
+    
+    def get_meta(self, key):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    # --- メモ ---
+    
+    def replace_notes(self, organized_notes):
+        """日付別・テーマ別に整理したメモで notes を置き換える（seq は辞書を走査した順番）"""
+        with self.connection:
+            self.connection.execute("DELETE FROM notes")
+            self.connection.executemany(
+                "INSERT INTO notes (seq, date, category_id, text) VALUES (?, ?, ?, ?)",
+                ((seq, date, category_id, note)
+                 for seq, (date, category_id, note) in enumerate(
+                     (date, self.category_id(category), note)
+                     for date, categories in organized_notes.items()
+                     for category, notes in categories.items()
+                     for note in notes)))
+    
+    def add_notes(self, organized_notes, prepend=False):
+        """日付別・テーマ別に整理したメモを notes に追加する（prepend なら既存のメモより前の seq を振る）"""
+        count = sum(len(notes) for categories in organized_notes.values() for notes in categories.values())
+        low, high = self.connection.execute("SELECT MIN(seq), MAX(seq) FROM notes").fetchone()
+        start = (low or 0) - count if prepend else (high + 1 if high is not None else 0)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO notes (seq, date, category_id, text) VALUES (?, ?, ?, ?)",
+                ((seq, date, category_id, note)
+                 for seq, (date, category_id, note) in enumerate(
+                     ((date, self.category_id(category), note)
+                      for date, categories in organized_notes.items()
+                      for category, notes in categories.items()
+                      for note in notes), start)))
+    
+    def notes(self):
+        """organize.py の現在の考えの生成・変化の検出に渡すメモ"""
+        return NotesView(self)
+    
+    def note_count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+    
+    def query_notes(self, category=None, since=None, until=None):
+        """カテゴリと日付の範囲（両端を含む）でメモを (日付, カテゴリ, 本文) の日付順に検索"""
+        sql, params = self._filter("n", category, since, until)
+        return self.connection.execute(
+            "SELECT n.date, c.name, n.text FROM notes n JOIN categories c ON c.id = n.category_id"
+            + sql + " ORDER BY n.date, n.seq", params).fetchall()
+    
+    def export_raw_notes(self):
+        """メモを raw-notes.txt の形式（新しい日付が先頭）で出力"""
+        lines = []
+        date = None
+        for note_date, text in self.connection.execute(
+                "SELECT date, text FROM notes ORDER BY date DESC, seq"):
+            if note_date != date:
+                if date is not None:
+                    lines.append("")
+                lines.append(note_date)
+                date = note_date
+            lines.append(text)
+        return "\n".join(lines) + "\n" if lines else ""
+    
+    # --- 現在の考え ---
+    
+    def replace_thoughts(self, current_thoughts):
+        """current-thoughts.txt の形式のテキストで thoughts を置き換える"""
+        updated_at = None
+        for line in current_thoughts.split('\n'):
+            if line.startswith("最終更新: "):
+                updated_at = line[len("最終更新: "):].strip()
+                break
+        
+        with self.connection:
+            self.connection.execute("DELETE FROM thoughts")
+            self.connection.executemany(
+                "INSERT INTO thoughts (category_id, text) VALUES (?, ?)",
+                [(self.category_id(category or 'その他'), thought)
+                 for category, thought in iter_thoughts(current_thoughts)])
+            self.set_meta('thoughts_updated_at', updated_at)
+            # generate.py はこの番号が変わった時だけインデックスを作り直す
+            self.set_meta('thoughts_version', str(int(self.get_meta('thoughts_version') or 0) + 1))
+    
+    def thoughts_version(self):
+        """現在の考えを置き換えるたびに増える番号（一度も保存していなければNone）"""
+        version = self.get_meta('thoughts_version')
+        return int(version) if version is not None else None
+    
+    def thought_rows(self):
+        """現在の考えを (カテゴリ, 考え) で保存した順に返す"""
+        return self.connection.execute(
+            "SELECT c.name, t.text FROM thoughts t JOIN categories c ON c.id = t.category_id "
+            "ORDER BY t.id").fetchall()
+    
+    def export_current_thoughts(self):
+        """現在の考えを current-thoughts.txt の形式で出力"""
+        lines = [THOUGHTS_TITLE, f"最終更新: {self.get_meta('thoughts_updated_at') or ''}", ""]
+        category = None
+        for name, thought in self.thought_rows():
+            if name != category:
+                if category is not None:
+                    lines.append("")
+                lines.append(f"【{name}】")
+                category = name
+            lines.append(f"・{thought}")
+        if category is not None:
+            lines.append("")
+        return "\n".join(lines)
+    
+    # --- 考えの変化履歴 ---
+    
+    def evolution_count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM evolution").fetchone()[0]
+    
+    def last_recorded_at(self):
+        """最後に登録した変化の記録日時（まだなければNone）"""
+        row = self.connection.execute("SELECT recorded_at FROM evolution ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+    
+    def add_evolution(self, evolution_log, recorded_at=None):
+        """未登録の変化だけを追加し、新しく登録したエントリを返す（EvolutionStore.add_many と同じ）"""
+        recorded_at = recorded_at or datetime.now().strftime('%Y-%m-%d %H:%M')
+        added = []
+        
+        with self.connection:
+            for entry in evolution_log:
+                record = {
+                    'date': entry['date'],
+                    'category': entry['category'],
+                    'previous': entry['previous'],
+                    'current': entry['current'],
+                    'change_type': entry['change_type'],
+                    'recorded_at': entry.get('recorded_at', recorded_at)
+                }
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO evolution (date, category_id, previous, current, change_type, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (record['date'], self.category_id(record['category']), record['previous'],
+                     record['current'], record['change_type'], record['recorded_at']))
+                if cursor.rowcount:
+                    added.append(record)
+        
+        return added
+    
+    def query_evolution(self, category=None, since=None, until=None):
+        """カテゴリと日付の範囲（両端を含む）で変化履歴を検索（EvolutionStore.query と同じ順番）"""
+        sql, params = self._filter("e", category, since, until)
+        return self._evolution_entries(sql + " ORDER BY e.date, e.id", params)
+    
+    def export_evolution_log(self):
+        """変化履歴を evolution-log.txt の形式で出力（記録した順）"""
+        return render_text_log(self._evolution_entries(" ORDER BY e.id", ()))
+    
+    def _evolution_entries(self, sql, params):
+        cursor = self.connection.execute(
+            "SELECT e.date, c.name, e.previous, e.current, e.change_type, e.recorded_at "
+            "FROM evolution e JOIN categories c ON c.id = e.category_id" + sql, params)
+        return [{'date': date, 'category': category, 'previous': previous, 'current': current,
+                 'change_type': change_type, 'recorded_at': recorded_at}
+                for date, category, previous, current, change_type, recorded_at in cursor]
+    
+    def _filter(self, alias, category, since, until):
+        """カテゴリと日付の範囲の WHERE 句"""
+        conditions = []
+        params = []
+        if category is not None:
+            conditions.append(f"{alias}.category_id = ?")
+            params.append(self._category_ids.get(category, -1))
+        if since:
+            conditions.append(f"{alias}.date >= ?")
+            params.append(since)
+        if until:
+            conditions.append(f"{alias}.date <= ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+    
+    # --- テキストファイルとの取り込み・書き出し ---
+    
+    def import_evolution_files(self, jsonl_file, text_file):
+        """変化履歴を evolution-log.jsonl（なければ evolution-log.txt）から取り込む"""
+        if os.path.exists(jsonl_file):
+            return self.add_evolution(EvolutionStore(jsonl_file).entries)
+        if os.path.exists(text_file):
+            return self.add_evolution(parse_text_log(text_file))
+        return []
+
+def import_files(db, base_dir):
+    """raw-notes.txt・current-thoughts.txt・変化履歴をデータベースに取り込む"""
+    from organize import IshiharaNotesOrganizer
+    
+    organizer = IshiharaNotesOrganizer(base_dir)
+    if os.path.exists(organizer.raw_notes_file):
+        organized_notes = organizer.parse_raw_notes()
+        db.replace_notes(organized_notes)
+        print(f"メモ{db.note_count()}件を取り込みました")
+    
+    if os.path.exists(organizer.current_thoughts_file):
+        with open(organizer.current_thoughts_file, 'r', encoding='utf-8') as f:
+            db.replace_thoughts(f.read())
+        print(f"現在の考え{len(db.thought_rows())}件を取り込みました")
+    
+    added = db.import_evolution_files(organizer.evolution_store_file, organizer.evolution_log_file)
+    print(f"考えの変化{len(added)}件を取り込みました")
+
+def export_files(db, base_dir):
+    """データベースの内容をテキストファイルに書き出す（raw-notes.txt は上書きしない）"""
+    os.makedirs(base_dir, exist_ok=True)
+    outputs = [
+        ("notes-export.txt", db.export_raw_notes()),
+        ("current-thoughts.txt", db.export_current_thoughts()),
+        ("evolution-log.txt", db.export_evolution_log())
+    ]
+    for name, content in outputs:
+        with open(os.path.join(base_dir, name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        print(f"{name}を書き出しました")
+
+def main():
+    parser = argparse.ArgumentParser(description="メモ・現在の考え・考えの変化履歴のSQLiteストア")
+    parser.add_argument('--db', required=True, help="SQLiteファイル")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('import', "テキストファイルから取り込む"), ('export', "テキストファイルに書き出す")):
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument('--base-dir', default=".")
+    for command, help_text in (('notes', "メモを検索"), ('evolution', "考えの変化履歴を検索")):
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument('--category', help="カテゴリ（例: プロテイン・栄養）")
+        subparser.add_argument('--since', help="この日付以降（YYYY-MM-DD）")
+        subparser.add_argument('--until', help="この日付以前（YYYY-MM-DD）")
+    args = parser.parse_args()
+    
+    try:
+        db = NotesDatabase(args.db)
+    except sqlite3.Error as e:
+        print(f"エラー: {args.db} を開けません: {e}")
+        sys.exit(1)
+    
+    try:
+        if args.command == 'import':
+            import_files(db, args.base_dir)
+        elif args.command == 'export':
+            export_files(db, args.base_dir)
+        elif args.command == 'notes':
+            rows = db.query_notes(args.category, args.since, args.until)
+            for date, category, text in rows:
+                print(f"【{date} - {category}】{text}")
+            print(f"{len(rows)}件")
+        else:
+            entries = db.query_evolution(args.category, args.since, args.until)
+            for entry in entries:
+                print(f"【{entry['date']} - {entry['category']}】{entry['previous']} → {entry['current']}")
+            print(f"{len(entries)}件")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
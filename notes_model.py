@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+from array import array
+
+class NoteTable:
+    """整理済みのメモを列ごとの配列で持ち、(カテゴリ, 日付) 順の索引で引けるようにした表
+
+    日付別・カテゴリ別の辞書（parse_raw_notes の結果）を1回だけ走査して作り、
+    現在の考えの生成と変化の検出で共有する。category_names・dated_texts_oldest_first は、
+    SQLiteに保存したメモ（notes_db.NotesView）と共通の読み方。
+    """
+    
+    def __init__(self, organized_notes):
+        # 日付は文字列の順番どおりの番号にする（YYYY-MM-DD なので日付順と一致する）
+        self.date_names = sorted(organized_notes)
+        date_ids = {date: date_id for date_id, date in enumerate(self.date_names)}
+        
+        self.category_names = []    # カテゴリの番号 -> 名前（最初に出てきた順）
+        category_ids = {}
+        
+        # メモは入力の順番のまま列に格納する（同じ日付の中の順番を保つため）
+        self.dates = array('i')
+        self.categories = array('i')
+        self.texts = []
+        for date, categories in organized_notes.items():
+            date_id = date_ids[date]
+            for category, notes in categories.items():
+                category_id = category_ids.get(category)
+                if category_id is None:
+                    category_id = category_ids[category] = len(self.category_names)
+                    self.category_names.append(sys.intern(category))
+                for note in notes:
+                    self.dates.append(date_id)
+                    self.categories.append(category_id)
+                    # 何日にもわたって同じメモが出てくるので、本文は1つにまとめる
+                    self.texts.append(sys.intern(note))
+        
+        # (カテゴリ, 日付, 入力の順番) で並べた索引と、カテゴリごとの範囲
+        # カテゴリごとに行を振り分けてから、それぞれを日付で安定ソートする
+        buckets = [array('i') for _ in self.category_names]
+        for row, category_id in enumerate(self.categories):
+            buckets[category_id].append(row)
+        self.order = array('i')
+        self._bounds = [0]
+        for rows in buckets:
+            self.order.extend(sorted(rows, key=self.dates.__getitem__))
+            self._bounds.append(len(self.order))
+    
+    def __len__(self):
+        return len(self.texts)
+    
+    def rows_oldest_first(self, category_id):
+        """カテゴリのメモの行番号を、古い日付から（同じ日付は入力の順番で）返す"""
+        return self.order[self._bounds[category_id]:self._bounds[category_id + 1]]
+    
+    def dated_texts_oldest_first(self, category_id):
+        """カテゴリのメモを (日付, 本文) で、古い日付から（同じ日付は入力の順番で）返す"""
+        date_names = self.date_names
+        dates = self.dates
+        texts = self.texts
+        return [(date_names[dates[row]], texts[row]) for row in self.rows_oldest_first(category_id)]
@@ -2,115 +2,317 @@
 # -*- coding: utf-8 -*-
 
 import os
+import io
 import re
+import bisect
+import hashlib
+import argparse
 from datetime import datetime
-from collections import defaultdict
 import json
 
+from matcher import KeywordMatcher
+from evolution_store import EvolutionStore, append_new_entries, render_text_log
+from similarity import shingles, jaccard
+from notes_model import NoteTable
+from notes_db import NotesDatabase, NotesView
+from atomic_write import atomic_write
+from profiling import profiler, start_from_options
+
 class IshiharaNotesOrganizer:
-    def __init__(self, base_dir="."):
+    # テーマ別カテゴリ（この順番で出力される）
+    CATEGORIES = [
+        'プロテイン・栄養',
+        '筋トレ・頻度',
+        '継続・モチベーション',
+        '姿勢・体の悩み',
+        '睡眠',
+        'お客様との関わり',
+        '業界への疑問',
+        'トレーナーとしての気づき',
+        'その他'
+    ]
+    
+    # 日付見出しの形式
+    DATE_PATTERN = r'(\d{4}-\d{2}-\d{2})'
+    
+    # チェックポイントの照合で処理済みの範囲をハッシュする時に、一度に読むバイト数
+    CHECKPOINT_CHUNK = 1024 * 1024
+    # チェックポイントの形式（カテゴリごとの状態だけを持つ）
+    CHECKPOINT_VERSION = 2
+    # 現在の考えは、カテゴリごとに新しい方からこの件数のメモの中から選ぶ（チェックポイントにも残す）
+    THOUGHT_LOOKBACK = 200
+    # 現在の考えとしてカテゴリごとに残す件数
+    THOUGHTS_PER_CATEGORY = 3
+    
+    # キーワードベースでカテゴリ分類（複数一致した場合は先に書いたカテゴリを優先）
+    KEYWORD_MAP = {
+        'プロテイン・栄養': ['プロテイン', '栄養', '食事', 'サプリ'],
+        '筋トレ・頻度': ['筋トレ', '頻度', '週', '毎日', 'トレーニング'],
+        '継続・モチベーション': ['継続', '楽しく', 'モチベーション', '続け'],
+        '姿勢・体の悩み': ['猫背', '反り腰', '腰痛', '姿勢'],
+        '睡眠': ['睡眠'],
+        'お客様との関わり': ['お客様', '体験', 'セッション'],
+        '業界への疑問': ['業界', '広告', '根性論', '画一的'],
+        'トレーナーとしての気づき': ['トレーナー', '指導', '完璧', '親近感']
+    }
+    
+    def __init__(self, base_dir=".", similarity_threshold=0.3, db_file=None):
         self.base_dir = base_dir
+        self.similarity_threshold = similarity_threshold
         self.raw_notes_file = os.path.join(base_dir, "raw-notes.txt")
         self.current_thoughts_file = os.path.join(base_dir, "current-thoughts.txt")
         self.evolution_log_file = os.path.join(base_dir, "evolution-log.txt")
+        self.evolution_store_file = os.path.join(base_dir, "evolution-log.jsonl")
+        self.checkpoint_file = os.path.join(base_dir, ".organize-checkpoint.json")
+        # 常駐して使う時は、最後に保存したチェックポイントをメモリに持っておく（ファイルの状態と一緒に）
+        self._checkpoint = None
+        self._checkpoint_stat = None
+        self.last_date = None
+        
+        # db_file を指定すると、メモ・現在の考え・変化履歴をSQLiteに保存して、そこから引く
+        self.db = NotesDatabase(db_file) if db_file else None
+        
+        # キーワード -> カテゴリの優先順位 のオートマトンを1回だけ構築
+        keyword_ranks = {}
+        for rank, category in enumerate(self.CATEGORIES):
+            for keyword in self.KEYWORD_MAP.get(category, []):
+                keyword_ranks.setdefault(keyword, rank)
+        self.category_matcher = KeywordMatcher(keyword_ranks)
         
+    @profiler.timed('parse')
     def parse_raw_notes(self):
         """raw-notes.txtを解析して日付別・テーマ別に整理"""
         if not os.path.exists(self.raw_notes_file):
             print(f"エラー: {self.raw_notes_file} が見つかりません")
             return {}
         
+        # ファイル全体を読み込まず、1行ずつ流して整理する
         with open(self.raw_notes_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 日付ごとにメモを分割
-        date_pattern = r'(\d{4}-\d{2}-\d{2})'
-        entries = re.split(date_pattern, content)
+            return self.collect_notes(self.iter_raw_notes(f))
+    
+    @profiler.timed('parse')
+    def parse_notes_text(self, content, current_date=None):
+        """メモのテキストを日付別・テーマ別に整理（current_dateは直前のブロックの日付）"""
+        organized_notes = self.collect_notes(self.iter_raw_notes(io.StringIO(content), current_date))
+        return organized_notes, self.last_date
+    
+    def iter_raw_notes(self, lines, current_date=None):
+        """メモを1行ずつ読み、(日付, メモ) を順に返す"""
+        date_pattern = re.compile(self.DATE_PATTERN)
+        # 最後に読んだ日付見出し（差分更新で続きを読む時の起点になる）
+        self.last_date = current_date
         
+        for line in lines:
+            # 行の途中に日付がある場合も、そこから新しい日付のメモとして扱う
+            for part in date_pattern.split(line):
+                if date_pattern.fullmatch(part):
+                    self.last_date = part
+                elif self.last_date and part.strip():
+                    yield self.last_date, part.strip()
+    
+    def iter_categorized(self, records):
+        """(日付, メモ) の流れを (日付, カテゴリ, メモ) に変換"""
+        for date, note in records:
+            yield date, self.classify_note(note), note
+    
+    def collect_notes(self, records):
+        """(日付, メモ) の流れを日付別・テーマ別に集約（同じ日付が何度出てきても追記する）"""
         organized_notes = {}
-        current_date = None
+        for date, category, note in self.iter_categorized(records):
+            organized_notes.setdefault(date, {}).setdefault(category, []).append(note)
+        
+        # カテゴリはCATEGORIESの順に並べる
+        return {date: {category: categories[category] for category in self.CATEGORIES if category in categories}
+                for date, categories in organized_notes.items()}
+    
+    def hash_range(self, f, start, end, *digests):
+        """ファイルの [start, end) を少しずつ読みながら、全ての digests に流し込む"""
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(self.CHECKPOINT_CHUNK, remaining))
+            if not chunk:
+                break
+            for digest in digests:
+                digest.update(chunk)
+            remaining -= len(chunk)
+    
+    def file_hash(self):
+        """raw-notes.txt の (サイズ, 全体のハッシュ)"""
+        digest = hashlib.sha256()
+        with open(self.raw_notes_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self.hash_range(f, 0, size, digest)
+        return size, digest.hexdigest()
+    
+    @profiler.timed('load_checkpoint')
+    def load_checkpoint(self):
+        """前回処理した範囲とカテゴリごとの状態を読み込み（以前の形式ならNone）"""
+        if not os.path.exists(self.checkpoint_file):
+            return None
         
-        for entry in entries:
-            if re.match(date_pattern, entry):
-                current_date = entry
-            elif current_date and entry.strip():
-                # メモの内容をテーマごとに分類
-                notes_lines = [line.strip() for line in entry.strip().split('\n') if line.strip()]
-                organized_notes[current_date] = self.categorize_notes(notes_lines)
+        # 前回保存したまま変わっていなければ、JSONを読み直さない
+        stat = os.stat(self.checkpoint_file)
+        if self._checkpoint is not None and self._checkpoint_stat == (stat.st_mtime_ns, stat.st_size):
+            return self._checkpoint
         
-        return organized_notes
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('version') != self.CHECKPOINT_VERSION:
+            return None
+        return checkpoint
     
-    def categorize_notes(self, notes_lines):
-        """メモをテーマ別に分類"""
-        categories = {
-            'プロテイン・栄養': [],
-            '筋トレ・頻度': [],
-            '継続・モチベーション': [],
-            '姿勢・体の悩み': [],
-            '睡眠': [],
-            'お客様との関わり': [],
-            '業界への疑問': [],
-            'トレーナーとしての気づき': [],
-            'その他': []
-        }
+    @profiler.timed('save')
+    def save_checkpoint(self, checkpoint):
+        """チェックポイントを保存（書きかけのファイルが残らないよう一時ファイルから置き換える）"""
+        checkpoint['version'] = self.CHECKPOINT_VERSION
+        atomic_write(self.checkpoint_file, json.dumps(checkpoint, ensure_ascii=False))
         
-        # キーワードベースでカテゴリ分類
-        keyword_map = {
-            'プロテイン・栄養': ['プロテイン', '栄養', '食事', 'サプリ'],
-            '筋トレ・頻度': ['筋トレ', '頻度', '週', '毎日', 'トレーニング'],
-            '継続・モチベーション': ['継続', '楽しく', 'モチベーション', '続け'],
-            '姿勢・体の悩み': ['猫背', '反り腰', '腰痛', '姿勢'],
-            '睡眠': ['睡眠'],
-            'お客様との関わり': ['お客様', '体験', 'セッション'],
-            '業界への疑問': ['業界', '広告', '根性論', '画一的'],
-            'トレーナーとしての気づき': ['トレーナー', '指導', '完璧', '親近感']
+        stat = os.stat(self.checkpoint_file)
+        self._checkpoint = checkpoint
+        self._checkpoint_stat = (stat.st_mtime_ns, stat.st_size)
+    
+    def build_checkpoint(self, table, thoughts, organized_notes, last_date, size, content_hash):
+        """全てのメモを解析した結果から、差分更新に使う状態を作る
+        
+        メモそのものは全ては持たず、カテゴリごとに新しい方の THOUGHT_LOOKBACK 件と先頭の部分
+        （どちらも古い順の [日付, メモ]）、現在の考えだけを残す。
+        """
+        categories = {}
+        for category_id, category in enumerate(table.category_names):
+            notes = [list(note) for note in table.dated_texts_oldest_first(category_id)]
+            categories[category] = self.category_state(notes, True, thoughts[category])
+        
+        dates = list(organized_notes)
+        return {
+            'size': size,
+            'hash': content_hash,
+            'last_date': last_date,
+            'last_key': dates[-1],
+            'min_date': min(dates),
+            'max_date': max(dates),
+            'days': len(dates),
+            'count': self.count_notes(organized_notes),
+            'categories': categories
         }
+    
+    @profiler.timed('load_checkpoint')
+    def read_new_notes(self, checkpoint):
+        """前回から追加された部分だけを読み込む（追加位置が特定できなければNone）
+        
+        (追加されたテキスト, 直前の日付, 先頭に追加されたか, サイズ, 全体のハッシュ) を返す。
+        処理済みの範囲の照合と、次のチェックポイントに使う全体のハッシュは1回の読み込みで求める。
+        """
+        if not os.path.exists(self.raw_notes_file):
+            return None
+        
+        expected = checkpoint['hash']
+        old_size = checkpoint['size']
+        
+        with open(self.raw_notes_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < old_size:
+                return None
+            
+            # 末尾に追記された場合（直前の日付のブロックの続きになりうる）
+            # 処理済みの範囲は全体を照合する（途中の編集も追記と取り違えないように）
+            digest = hashlib.sha256()
+            self.hash_range(f, 0, old_size, digest)
+            if digest.hexdigest() == expected:
+                f.seek(max(old_size - 1, 0))
+                previous = f.read(1) if old_size else b'\n'
+                added = f.read()
+                # 最後の行に続けて書き足された場合は全体を解析し直す
+                if added and previous != b'\n' and not added[:1].isspace():
+                    return None
+                digest.update(added)
+                return added.decode('utf-8'), checkpoint['last_date'], False, size, digest.hexdigest()
+            
+            # 先頭に新しい日付が書き足された場合（新しい順に書くraw-notes.txtの書き方）
+            f.seek(0)
+            added = f.read(size - old_size)
+            digest = hashlib.sha256(added)
+            tail_digest = hashlib.sha256()
+            self.hash_range(f, size - old_size, size, tail_digest, digest)
+            if tail_digest.hexdigest() == expected:
+                return added.decode('utf-8'), None, True, size, digest.hexdigest()
+        
+        return None
+    
+    def count_notes(self, organized_notes):
+        """日付別・テーマ別に整理したメモの件数"""
+        return sum(len(notes) for categories in organized_notes.values() for notes in categories.values())
+    
+    def classify_note(self, note):
+        """メモ1件のカテゴリを判定（1回の走査で全キーワードを照合）"""
+        ranks = self.category_matcher.find(note)
+        if not ranks:
+            return 'その他'
+        return self.CATEGORIES[min(ranks)]
+    
+    @profiler.timed('categorize')
+    def categorize_notes(self, notes_lines):
+        """メモをテーマ別に分類"""
+        categories = {category: [] for category in self.CATEGORIES}
         
         for note in notes_lines:
-            categorized = False
-            for category, keywords in keyword_map.items():
-                if any(keyword in note for keyword in keywords):
-                    categories[category].append(note)
-                    categorized = True
-                    break
-            if not categorized:
-                categories['その他'].append(note)
+            categories[self.classify_note(note)].append(note)
         
         # 空のカテゴリを削除
         return {k: v for k, v in categories.items() if v}
     
+    def note_table(self, organized_notes):
+        """日付別・テーマ別の辞書から、各段階で共有する表を作る（作成済みならそのまま返す）"""
+        if isinstance(organized_notes, (NoteTable, NotesView)):
+            return organized_notes
+        return NoteTable(organized_notes)
+    
     def generate_current_thoughts(self, organized_notes):
         """現在の考えを体系的に整理"""
-        all_categories = defaultdict(list)
+        return self.render_current_thoughts(self.collect_current_thoughts(organized_notes))
+    
+    @profiler.timed('current_thoughts')
+    def collect_current_thoughts(self, organized_notes):
+        """カテゴリごとに最新の考えを選ぶ"""
+        table = self.note_table(organized_notes)
+        return {category: self.select_thoughts(self.newest_first(
+                    table.dated_texts_oldest_first(category_id)[-self.THOUGHT_LOOKBACK:]))
+                for category_id, category in enumerate(table.category_names)}
+    
+    @staticmethod
+    def newest_first(dated_notes):
+        """古い順の (日付, メモ) を、新しい日付から（同じ日付は入力の順番で）のメモの本文にする"""
+        by_date = {}
+        for date, note in dated_notes:
+            by_date.setdefault(date, []).append(note)
+        return [note for date in sorted(by_date, reverse=True) for note in by_date[date]]
+    
+    def select_thoughts(self, notes_newest_first):
+        """新しい順のメモから、互いに似ていない考えを THOUGHTS_PER_CATEGORY 件まで選ぶ"""
+        # 最新の考えを優先して整理
+        recent_thoughts = []
+        # 残すのは高々3件なので、索引を作らずに残した考えと厳密に比べる（is_similar_thoughtと同じ判定）
+        kept_shingles = []
         
-        # 全ての日付のメモを統合
-        for date, categories in organized_notes.items():
-            for category, notes in categories.items():
-                for note in notes:
-                    all_categories[category].append((date, note))
+        for note in notes_newest_first:
+            if len(recent_thoughts) >= self.THOUGHTS_PER_CATEGORY:  # 最新の3つの考えまで
+                break
+            note_shingles = shingles(note)
+            if not any(jaccard(note_shingles, other) > self.similarity_threshold for other in kept_shingles):
+                kept_shingles.append(note_shingles)
+                recent_thoughts.append(note)
         
-        # 最新の考えを抽出・体系化
+        return recent_thoughts
+    
+    def render_current_thoughts(self, thoughts):
+        """カテゴリごとの考えを current-thoughts.txt の形式にする"""
         current_thoughts = []
         current_thoughts.append("=== 石原トレーナーの現在の考え・哲学 ===")
         current_thoughts.append(f"最終更新: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
         current_thoughts.append("")
         
-        for category, notes_with_dates in all_categories.items():
-            if not notes_with_dates:
-                continue
-                
+        for category, recent_thoughts in thoughts.items():
             current_thoughts.append(f"【{category}】")
-            
-            # 最新の考えを優先して整理
-            notes_with_dates.sort(key=lambda x: x[0], reverse=True)
-            recent_thoughts = []
-            
-            for date, note in notes_with_dates:
-                if not any(self.is_similar_thought(note, existing) for existing in recent_thoughts):
-                    recent_thoughts.append(note)
-                    if len(recent_thoughts) >= 3:  # 最新の3つの考えまで
-                        break
-            
             for thought in recent_thoughts:
                 current_thoughts.append(f"・{thought}")
             current_thoughts.append("")
@@ -119,111 +321,349 @@ class IshiharaNotesOrganizer:
     
     def is_similar_thought(self, thought1, thought2):
         """類似する考えかどうかを判定"""
-        # 簡単な類似度判定（共通キーワードの比率）
-        words1 = set(thought1.split())
-        words2 = set(thought2.split())
-        if not words1 or not words2:
-            return False
-        common_ratio = len(words1.intersection(words2)) / len(words1.union(words2))
-        return common_ratio > 0.3
+        # 文字n-gramの共通部分の比率（日本語は空白で区切れないため）
+        return jaccard(shingles(thought1), shingles(thought2)) > self.similarity_threshold
     
+    @profiler.timed('evolution')
     def detect_evolution(self, organized_notes):
         """考えの変化を検出"""
+        table = self.note_table(organized_notes)
         evolution_log = []
         
         # 各カテゴリで時系列での変化を検出
-        all_categories = defaultdict(list)
-        for date, categories in organized_notes.items():
+        for category_id, category in enumerate(table.category_names):
+            notes = table.dated_texts_oldest_first(category_id)
+            
+            # 変化を検出（表はカテゴリごとに日付順に並んでいる）
+            evolution_log.extend(self.evolution_entries(category, zip(notes, notes[1:])))
+        
+        return evolution_log
+    
+    def evolution_entries(self, category, pairs):
+        """隣り合うメモの組 ((日付, 以前のメモ), (日付, 現在のメモ)) から変化のエントリを作る"""
+        for (_, prev_note), (date, curr_note) in pairs:
+            # 明らかに異なる考えが出現した場合
+            if not self.is_similar_thought(prev_note, curr_note):
+                yield {
+                    'date': date,
+                    'category': category,
+                    'previous': prev_note,
+                    'current': curr_note,
+                    'change_type': '考えの発展'
+                }
+    
+    @profiler.timed('incremental')
+    def apply_new_notes(self, checkpoint, new_notes, prepend):
+        """チェックポイントのカテゴリごとの状態に新しいメモを反映する
+        
+        (カテゴリごとの新しい状態, 変化のエントリ) を返す。次の場合は差分では正しく反映できないので
+        None を返し、全てのメモを解析し直す。
+        ・新しいメモの日付が既存のメモの日付の範囲の内側にある（末尾のブロックの続きは除く）
+        ・まだ一度も出てきていないカテゴリのメモがある
+        ・残しておいた先頭と新しい方のメモの間に入るメモがある
+        """
+        # 既存の日付と重なるのは、末尾に追記した時の最後の日付だけ（辞書の並びで同じ位置に入る）
+        continued = None if prepend else checkpoint['last_key']
+        for date in new_notes:
+            if not (date < checkpoint['min_date'] or date > checkpoint['max_date'] or date == continued):
+                return None
+        
+        added = {}
+        for date, categories in new_notes.items():
             for category, notes in categories.items():
-                for note in notes:
-                    all_categories[category].append((date, note))
+                if category not in checkpoint['categories']:
+                    return None
+                added.setdefault(category, []).extend([date, note] for note in notes)
+        
+        # カテゴリの並び（最初に出てきた順）は、先頭に追加した時だけ新しいメモの側から変わる
+        states = checkpoint['categories']
+        if prepend:
+            order = list(dict.fromkeys(category for categories in new_notes.values() for category in categories))
+            states = {category: states[category]
+                      for category in order + [category for category in states if category not in added]}
+        else:
+            states = dict(states)
         
-        for category, notes_with_dates in all_categories.items():
-            if len(notes_with_dates) < 2:
+        # 変化は全体を解析した時と同じく、カテゴリの並び順・古い順に記録する
+        evolution_log = []
+        for category in states:
+            if category not in added:
                 continue
-                
-            # 日付順にソート
-            notes_with_dates.sort(key=lambda x: x[0])
-            
-            # 変化を検出
-            for i in range(1, len(notes_with_dates)):
-                prev_date, prev_note = notes_with_dates[i-1]
-                curr_date, curr_note = notes_with_dates[i]
-                
-                # 明らかに異なる考えが出現した場合
-                if not self.is_similar_thought(prev_note, curr_note):
-                    evolution_entry = {
-                        'date': curr_date,
-                        'category': category,
-                        'previous': prev_note,
-                        'current': curr_note,
-                        'change_type': '考えの発展'
-                    }
-                    evolution_log.append(evolution_entry)
+            updated = self.apply_category_notes(category, states[category], added[category])
+            if updated is None:
+                return None
+            states[category], entries = updated
+            evolution_log.extend(entries)
         
-        return evolution_log
+        return states, evolution_log
+    
+    def category_state(self, notes, complete, thoughts, head=None):
+        """1カテゴリのチェックポイントの状態（notes は古い順の [日付, メモ]）
+        
+        recent: 新しい方の THOUGHT_LOOKBACK 件（complete なら全てのメモ）
+        head: 先頭から、一番古い日付のメモ全てとその次のメモまで（古い日付への書き足しに使う）
+        """
+        if complete:
+            oldest = notes[0][0]
+            end = next((i for i, (date, _) in enumerate(notes) if date != oldest), len(notes))
+            head = notes[:end + 1]
+        return {
+            'recent': notes[-self.THOUGHT_LOOKBACK:],
+            'complete': complete and len(notes) <= self.THOUGHT_LOOKBACK,
+            'head': head,
+            'thoughts': thoughts
+        }
+    
+    def apply_category_notes(self, category, state, notes):
+        """1カテゴリの状態に新しいメモ（[日付, メモ] を入力の順番で）を反映し、(新しい状態, 変化) を返す
+        
+        同じ日付の既存のメモがあれば、その後ろ（末尾のブロックの続き）に入る。
+        """
+        complete = state['complete']
+        # [日付, メモ, 新しいメモか] の並び（全てのメモを持っていれば head は使わない）
+        window = [note + [False] for note in state['recent']]
+        head = [] if complete else [note + [False] for note in state['head']]
+        
+        # 同じ日付の中は入力の順番のまま、日付の古い順に入れていく
+        window_changed = False
+        for date, note in sorted(notes, key=lambda note: note[0]):
+            if complete or date >= window[0][0]:
+                segment = window
+                window_changed = True
+            elif date <= head[0][0]:
+                segment = head
+            else:
+                return None
+            position = bisect.bisect_right([entry[0] for entry in segment], date)
+            segment.insert(position, [date, note, True])
+        
+        # 変化: 新しいメモが前後どちらかにある隣り合う組（古い日付に書き足したメモは「以前の考え」にもなる）
+        entries = []
+        for segment in (head, window):
+            positions = sorted({i for j, entry in enumerate(segment) if entry[2] for i in (j - 1, j) if i >= 0})
+            pairs = [(segment[i][:2], segment[i + 1][:2]) for i in positions if i + 1 < len(segment)]
+            entries.extend(self.evolution_entries(category, pairs))
+        
+        window = [entry[:2] for entry in window]
+        # 新しい方の THOUGHT_LOOKBACK 件が変わった時だけ、現在の考えを選び直す
+        thoughts = state['thoughts']
+        if window_changed:
+            thoughts = self.select_thoughts(self.newest_first(window[-self.THOUGHT_LOOKBACK:]))
+        
+        if complete:
+            return self.category_state(window, True, thoughts), entries
+        
+        # 先頭は、一番古い日付のメモ全てとその次のメモまでに詰める
+        head = [entry[:2] for entry in head]
+        oldest = head[0][0]
+        end = next((i for i, (date, _) in enumerate(head) if date != oldest), len(head))
+        return self.category_state(window, False, thoughts, head[:end + 1]), entries
+
     
+    def open_evolution_store(self):
+        """変化履歴のストアを開く（初回は既存のevolution-log.txtを取り込む）"""
+        if not os.path.exists(self.evolution_store_file) and os.path.exists(self.evolution_log_file):
+            store = EvolutionStore(self.evolution_store_file)
+            store.import_text_log(self.evolution_log_file)
+            return store
+        return EvolutionStore(self.evolution_store_file)
+    
+    @profiler.timed('save')
     def save_evolution_log(self, evolution_log):
-        """変化履歴を保存"""
+        """変化履歴を保存（記録済みの変化は追記しない）"""
         if not evolution_log:
-            return
-            
-        log_entries = []
-        log_entries.append(f"=== 考えの変化履歴 - {datetime.now().strftime('%Y-%m-%d %H:%M')} ===")
-        log_entries.append("")
-        
-        for entry in evolution_log:
-            log_entries.append(f"【{entry['date']} - {entry['category']}】")
-            log_entries.append(f"変化タイプ: {entry['change_type']}")
-            log_entries.append(f"以前の考え: {entry['previous']}")
-            log_entries.append(f"現在の考え: {entry['current']}")
-            log_entries.append("")
-        
-        # 既存のログに追記
-        if os.path.exists(self.evolution_log_file):
-            with open(self.evolution_log_file, 'a', encoding='utf-8') as f:
-                f.write("\n" + "\n".join(log_entries))
+            return []
+        
+        if self.db:
+            return self.save_evolution_db(evolution_log)
+        
+        # 初回（ストアがまだない時）とビューが消えている時だけ、ストア全体から描画する
+        if not os.path.exists(self.evolution_store_file) or not os.path.exists(self.evolution_log_file):
+            store = self.open_evolution_store()
+            added = store.add_many(evolution_log)
+            if added or not os.path.exists(self.evolution_log_file):
+                atomic_write(self.evolution_log_file, store.render_text())
+            return added
+        
+        # それ以外はストアを読み込まずに追記し、evolution-log.txtにも新しく記録した分だけを書き足す
+        added, last_recorded_at = append_new_entries(self.evolution_store_file, evolution_log)
+        self.append_evolution_text(added, last_recorded_at)
+        return added
+    
+    def save_evolution_db(self, evolution_log):
+        """変化履歴をデータベースに保存（初回は既存の変化履歴を取り込む）"""
+        rewrite = not os.path.exists(self.evolution_log_file)
+        if not self.db.evolution_count():
+            self.db.import_evolution_files(self.evolution_store_file, self.evolution_log_file)
+            rewrite = True
+        last_recorded_at = self.db.last_recorded_at()
+        added = self.db.add_evolution(evolution_log)
+        
+        # evolution-log.txtはデータベースから書き出したビュー（普段は新しく記録した分だけを書き足す）
+        if added and rewrite:
+            atomic_write(self.evolution_log_file, self.db.export_evolution_log())
         else:
-            with open(self.evolution_log_file, 'w', encoding='utf-8') as f:
-                f.write("\n".join(log_entries))
+            self.append_evolution_text(added, last_recorded_at)
+        
+        return added
+    
+    def append_evolution_text(self, added, last_recorded_at):
+        """新しく記録した変化を、全体を描画し直した時と同じ形でevolution-log.txtの末尾に書き足す"""
+        if added:
+            with open(self.evolution_log_file, 'a', encoding='utf-8') as f:
+                f.write(render_text_log(added, last_recorded_at))
     
-    def organize(self):
+    def organize(self, incremental=False):
         """メイン処理：メモの整理と更新"""
         print("メモを分析中...")
         
+        if incremental:
+            checkpoint = self.load_checkpoint()
+            update = self.read_new_notes(checkpoint) if checkpoint else None
+            if update is None:
+                print("チェックポイントが使えないため、全てのメモを解析します")
+            elif self.organize_new_notes(checkpoint, update):
+                return
+            else:
+                print("追加されたメモを差分で反映できないため、全てのメモを解析します")
+        
         # raw-notes.txtを解析
-        organized_notes = self.parse_raw_notes()
+        if not os.path.exists(self.raw_notes_file):
+            print(f"エラー: {self.raw_notes_file} が見つかりません")
+            return
+        with profiler.stage('parse'), open(self.raw_notes_file, 'r', encoding='utf-8') as f:
+            organized_notes = self.collect_notes(self.iter_raw_notes(f))
+        last_date = self.last_date
+        
         if not organized_notes:
             print("解析できるメモが見つかりませんでした")
             return
         
-        # 現在の考えを生成
-        current_thoughts = self.generate_current_thoughts(organized_notes)
+        # 現在の考えの生成と変化の検出は、同じ表（データベースを使う時はそこに保存したメモ）を使う
+        if self.db:
+            with profiler.stage('save'):
+                self.db.replace_notes(organized_notes)
+            table = self.db.notes()
+        else:
+            with profiler.stage('note_table'):
+                table = self.note_table(organized_notes)
+        
+        # 現在の考えを生成してcurrent-thoughts.txtを更新
+        thoughts = self.collect_current_thoughts(table)
+        self.save_current_thoughts(thoughts)
         
-        # current-thoughts.txtを更新
-        with open(self.current_thoughts_file, 'w', encoding='utf-8') as f:
-            f.write(current_thoughts)
+        # 考えの変化を検出して変化履歴を保存
+        recorded = self.save_evolution_log(self.detect_evolution(table))
         
-        # 考えの変化を検出
-        evolution_log = self.detect_evolution(organized_notes)
+        # 次回の差分更新のためにチェックポイントを保存
+        with profiler.stage('save'):
+            checkpoint = self.build_checkpoint(table, thoughts, organized_notes, last_date, *self.file_hash())
+        self.save_checkpoint(checkpoint)
         
-        # 変化履歴を保存
-        if evolution_log:
-            self.save_evolution_log(evolution_log)
+        self.report(checkpoint, recorded)
+    
+    def organize_new_notes(self, checkpoint, update):
+        """追加された部分だけを解析して反映する（差分で反映できなければFalse）"""
+        added_text, previous_date, prepend, size, content_hash = update
+        new_notes, added_last_date = self.parse_notes_text(added_text, previous_date)
+        last_date = checkpoint['last_date'] if prepend else added_last_date
+        
+        if not new_notes:
+            print("新しいメモはありませんでした")
+            # 空行や見出しだけが増えた時は、次回読み直さないよう処理済みの範囲だけ進める
+            if size != checkpoint['size']:
+                self.save_checkpoint(dict(checkpoint, size=size, hash=content_hash, last_date=last_date))
+            return True
         
-        # 結果を報告
-        total_notes = sum(len(cats) for cats in organized_notes.values() for cats in cats.values())
-        print(f"{len(organized_notes)}日分のメモから{total_notes}個の気づきを発見しました")
+        # データベースには新しいメモだけを追加する（前回の状態のままでなければ全体を入れ直す）
+        if self.db and self.db.note_count() != checkpoint['count']:
+            return False
+        
+        applied = self.apply_new_notes(checkpoint, new_notes, prepend)
+        if applied is None:
+            return False
+        states, evolution_log = applied
+        
+        new_count = self.count_notes(new_notes)
+        print(f"追加された{len(new_notes)}日分・{new_count}件のメモを解析しました")
+        
+        if self.db:
+            with profiler.stage('save'):
+                self.db.add_notes(new_notes, prepend)
+        
+        # 新しいメモが入ったカテゴリの考えだけが変わっている
+        self.save_current_thoughts({category: state['thoughts'] for category, state in states.items()})
+        recorded = self.save_evolution_log(evolution_log)
+        
+        dates = list(new_notes)
+        checkpoint = {
+            'size': size,
+            'hash': content_hash,
+            'last_date': last_date,
+            'last_key': checkpoint['last_key'] if prepend or dates[-1] == checkpoint['last_key'] else dates[-1],
+            'min_date': min(checkpoint['min_date'], *dates),
+            'max_date': max(checkpoint['max_date'], *dates),
+            'days': checkpoint['days'] + sum(date != checkpoint['last_key'] for date in dates),
+            'count': checkpoint['count'] + new_count,
+            'categories': states
+        }
+        self.save_checkpoint(checkpoint)
+        
+        self.report(checkpoint, recorded)
+        return True
+    
+    def save_current_thoughts(self, thoughts):
+        """カテゴリごとの考えでcurrent-thoughts.txt（データベースを使う時はそこにも）を更新"""
+        current_thoughts = self.render_current_thoughts(thoughts)
+        with profiler.stage('save'):
+            with open(self.current_thoughts_file, 'w', encoding='utf-8') as f:
+                f.write(current_thoughts)
+            if self.db:
+                self.db.replace_thoughts(current_thoughts)
+    
+    def report(self, checkpoint, recorded):
+        """結果を報告"""
+        print(f"{checkpoint['days']}日分のメモから{checkpoint['count']}個の気づきを発見しました")
         print("current-thoughts.txtを更新しました")
         
-        if evolution_log:
-            print(f"考えの変化{len(evolution_log)}件をevolution-log.txtに記録しました")
+        if recorded:
+            print(f"考えの変化{len(recorded)}件をevolution-log.txtに記録しました")
         else:
             print("新しい考えの変化は検出されませんでした")
 
 def main():
-    organizer = IshiharaNotesOrganizer()
-    organizer.organize()
+    parser = argparse.ArgumentParser(description="raw-notes.txtを整理してcurrent-thoughts.txtを更新")
+    parser.add_argument('--incremental', action='store_true',
+                        help="前回のチェックポイント以降に追加されたメモだけを解析")
+    parser.add_argument('--db', metavar='PATH',
+                        help="メモ・現在の考え・変化履歴を保存するSQLiteファイル（テキストファイルも書き出す）")
+    parser.add_argument('--watch', action='store_true',
+                        help="raw-notes.txtの更新を監視し、差分の整理と考えが変わった記事の作り直しを続ける")
+    parser.add_argument('--interval', type=float,
+                        help="--watch で更新を確認する間隔（秒、省略時は NotesWatcher.INTERVAL）")
+    parser.add_argument('--debounce', type=float,
+                        help="--watch で保存が落ち着くまで待つ時間（秒、省略時は NotesWatcher.DEBOUNCE）")
+    parser.add_argument('--with-archive', action='store_true',
+                        help="--watch で作り直す記事に過去記事の段落を引用する")
+    parser.add_argument('--profile', action='store_true',
+                        help="段階ごとの処理時間・呼び出し回数・メモリを表示（環境変数 ISHIHARA_PROFILE=1 でも有効）")
+    parser.add_argument('--profile-dir', metavar='DIR',
+                        help="Chrome trace・cProfile・tracemalloc の結果を書き出すディレクトリ")
+    args = parser.parse_args()
+    
+    start_from_options(args.profile, args.profile_dir)
+    try:
+        organizer = IshiharaNotesOrganizer(db_file=args.db)
+        if args.watch:
+            # 監視は記事の生成まで読み込むので、--watch の時だけ読み込む
+            from watch import NotesWatcher
+            timing = {name: value for name, value in (('interval', args.interval), ('debounce', args.debounce))
+                      if value is not None}
+            NotesWatcher.for_organizer(organizer, use_archive=args.with_archive, **timing).run()
+        else:
+            organizer.organize(incremental=args.incremental)
+    finally:
+        profiler.finish()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
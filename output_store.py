@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+
+from atomic_write import atomic_write
+
+def content_key(*parts):
+    """記事の入力をまとめたハッシュ（同じ入力なら同じ記事になる）"""
+    payload = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class OutputStore:
+    """入力のハッシュから生成済みの記事ファイルを引く索引（.cache/outputs.json）"""
+    
+    def __init__(self, index_file, base_dir="."):
+        self.index_file = index_file
+        self.base_dir = base_dir
+        self._entries = None
+        self._dirty = False
+    
+    def entries(self):
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+        return self._entries
+    
+    def lookup(self, key):
+        """生成済みなら (パス, 文字数) を返す（ファイルが消えていれば None）"""
+        entry = self.entries().get(key)
+        if entry is None:
+            return None
+        filepath = os.path.join(self.base_dir, entry['path'])
+        if not os.path.exists(filepath):
+            return None
+        return filepath, entry['chars']
+    
+    def record(self, key, filepath, char_count, topic, platform):
+        """生成した記事を登録"""
+        path = os.path.relpath(filepath, self.base_dir)
+        entries = self.entries()
+        # 同じ分に同じテーマを作り直すとファイルが上書きされるので、前の登録は外す
+        for stale in [other for other, entry in entries.items() if entry['path'] == path]:
+            del entries[stale]
+        entries[key] = {
+            'path': path,
+            'chars': char_count,
+            'topic': topic,
+            'platform': platform
+        }
+        self._dirty = True
+    
+    def save(self):
+        if self._dirty:
+            atomic_write(self.index_file, json.dumps(self.entries(), ensure_ascii=False, indent=1))
+            self._dirty = False
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""処理段階ごとの計測（--profile または環境変数 ISHIHARA_PROFILE=1 で有効になる）
+
+段階（読み込み・抽出・描画・整形・保存など）ごとに、経過時間・呼び出し回数・
+確保したメモリを記録して最後に一覧を表示する。出力先（--profile-dir または
+ISHIHARA_PROFILE_DIR）を指定すると、次のファイルも書き出す。
+
+    trace.json        Chrome の chrome://tracing や Perfetto で開けるタイムライン
+    cprofile.prof     cProfile の結果（python -m pstats で読める）
+    tracemalloc.txt   メモリを多く確保した行の上位
+
+無効な時は各段階の計測は何もしないので、普段の実行には影響しない。
+"""
+
+import os
+import time
+import cProfile
+import functools
+import threading
+import tracemalloc
+import json
+
+PROFILE_ENV = "ISHIHARA_PROFILE"
+PROFILE_DIR_ENV = "ISHIHARA_PROFILE_DIR"
+
+class _NullStage:
+    """無効時に使う何もしない段階"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    """1回分の段階の計測"""
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        self.memory = tracemalloc.get_traced_memory()[0] if self.profiler.track_memory else 0
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        allocated = tracemalloc.get_traced_memory()[0] - self.memory if self.profiler.track_memory else 0
+        self.profiler.record(self.name, self.started, elapsed, allocated)
+        return False
+
+class Profiler:
+    """段階ごとの経過時間・呼び出し回数・メモリを集計する"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.output_dir = None
+        self.stats = {}     # 段階名 -> [呼び出し回数, 合計秒数, 最大秒数, 確保したバイト数の合計]
+        self.events = []    # Chrome trace のイベント
+        self._origin = time.perf_counter()
+        self._cprofile = None
+        self._lock = threading.Lock()
+    
+    def start(self, output_dir=None, track_memory=True):
+        """計測を始める（output_dir を指定すると終了時にダンプを書き出す）"""
+        self.enabled = True
+        self.output_dir = output_dir
+        self.track_memory = track_memory
+        self._origin = time.perf_counter()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if output_dir:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+    
+    def stage(self, name):
+        """with profiler.stage('render'): の形で段階を計測"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+    
+    def timed(self, name):
+        """メソッド全体を段階として計測するデコレーター"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+    
+    def iterate(self, name, chunks):
+        """ジェネレーターが断片を作るのにかかった時間を、1回の段階として計測"""
+        if not self.enabled:
+            return chunks
+        return self._iterate(name, chunks)
+    
+    def _iterate(self, name, chunks):
+        started = time.perf_counter()
+        elapsed = 0.0
+        allocated = 0
+        iterator = iter(chunks)
+        while True:
+            memory = tracemalloc.get_traced_memory()[0] if self.track_memory else 0
+            step_started = time.perf_counter()
+            chunk = next(iterator, None)
+            elapsed += time.perf_counter() - step_started
+            if self.track_memory:
+                allocated += tracemalloc.get_traced_memory()[0] - memory
+            if chunk is None:
+                break
+            yield chunk
+        self.record(name, started, elapsed, allocated)
+    
+    def record(self, name, started, elapsed, allocated=0):
+        with self._lock:
+            stats = self.stats.setdefault(name, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            stats[3] += allocated
+            self.events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': round((started - self._origin) * 1e6, 1),
+                'dur': round(elapsed * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': threading.get_ident()
+            })
+    
+    def summary(self):
+        """段階ごとの集計を、合計時間の長い順に表示"""
+        print("\n=== 段階ごとの計測 ===")
+        print(f"{'段階':<24}{'回数':>8}{'合計(ms)':>12}{'平均(µs)':>12}{'最大(ms)':>12}{'確保(KiB)':>12}")
+        for name, (calls, total, longest, allocated) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            print(f"{name:<24}{calls:>8}{total * 1000:>12.2f}{total / calls * 1e6:>12.1f}"
+                  f"{longest * 1000:>12.2f}{allocated / 1024:>12.1f}")
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"メモリ: 現在{current / 1024:,.0f}KiB / ピーク{peak / 1024:,.0f}KiB")
+        print("段階は入れ子になるため（描画の中の整形など）、合計時間は重複して数えられます")
+    
+    def finish(self):
+        """計測を終えて一覧を表示し、出力先があればダンプを書き出す"""
+        if not self.enabled:
+            return
+        if self._cprofile:
+            self._cprofile.disable()
+        # 計測自体の確保を含めないよう、ダンプを書く前にメモリの状態を撮っておく
+        snapshot = None
+        if self.track_memory and self.output_dir:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, __file__)
+            ])
+        
+        self.summary()
+        
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, "trace.json"), 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+            self._cprofile.dump_stats(os.path.join(self.output_dir, "cprofile.prof"))
+            if snapshot:
+                with open(os.path.join(self.output_dir, "tracemalloc.txt"), 'w', encoding='utf-8') as f:
+                    for statistic in snapshot.statistics('lineno')[:50]:
+                        f.write(f"{statistic}\n")
+            print(f"計測結果を書き出しました: {self.output_dir}（trace.json / cprofile.prof / tracemalloc.txt）")
+        
+        if self.track_memory:
+            tracemalloc.stop()
+        self.enabled = False
+
+# プロセス全体で共有する計測器
+profiler = Profiler()
+
+def start_from_options(profile=False, profile_dir=None):
+    """コマンドラインの指定か環境変数で有効なら計測を始める"""
+    profile_dir = profile_dir or os.environ.get(PROFILE_DIR_ENV) or None
+    enabled = profile or bool(profile_dir) or os.environ.get(PROFILE_ENV, '') not in ('', '0')
+    if enabled:
+        profiler.start(profile_dir)
+    return enabled
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import math
+import heapq
+
+from similarity import ngram_counts, is_hiragana
+
+class TfidfIndex:
+    """文字n-gramのTF-IDFベクトルで、クエリに近い文章を順位付けする索引
+
+    文章ごとの重み（L2正規化済み）を n-gram -> [(文章ID, 重み)] の疎な転置リストで持ち、
+    クエリのスコアはクエリに含まれる n-gram の転置リストだけを足し合わせて求める
+    （疎行列とクエリベクトルの積と同じ）。
+    """
+    
+    def __init__(self, documents, ngram=2):
+        self.ngram = ngram
+        self.size = 0
+        self.postings = {}      # n-gram -> [(文章ID, 重み)]
+        self.idf = {}
+        
+        counts = []
+        document_frequency = {}
+        for text in documents:
+            grams = ngram_counts(text, ngram)
+            counts.append(grams)
+            for gram in grams:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+        self.size = len(counts)
+        
+        # 平滑化したIDF（全ての文章に出てくる n-gram も重み0にはしない）
+        self.idf = {gram: math.log((1 + self.size) / (1 + df)) + 1
+                    for gram, df in document_frequency.items()}
+        
+        for document_id, grams in enumerate(counts):
+            weights = {gram: count * self.idf[gram] for gram, count in grams.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            for gram, weight in weights.items():
+                self.postings.setdefault(gram, []).append((document_id, weight / norm))
+    
+    def __len__(self):
+        return self.size
+    
+    def scores(self, query):
+        """クエリとのコサイン類似度を、0より大きい文章だけ {文章ID: スコア} で返す"""
+        return self.scores_and_matches(query)[0]
+    
+    def scores_and_matches(self, query):
+        """クエリとのコサイン類似度と、クエリと共通する n-gram の種類数を {文章ID: 値} で返す
+        
+        共通する種類数には、ひらがなだけの n-gram（「につ」「いて」など）は数えない。
+        """
+        weights = {gram: count * self.idf[gram]
+                   for gram, count in ngram_counts(query, self.ngram).items() if gram in self.idf}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        
+        scores = {}
+        matches = {}
+        for gram, weight in weights.items():
+            weight /= norm
+            content = not is_hiragana(gram)
+            for document_id, document_weight in self.postings[gram]:
+                scores[document_id] = scores.get(document_id, 0.0) + weight * document_weight
+                if content:
+                    matches[document_id] = matches.get(document_id, 0) + 1
+        return scores, matches
+    
+    def top(self, query, limit, min_score=0.0, min_matches=1):
+        """スコアの高い順に (文章ID, スコア) を最大 limit 件（同点は文章IDの順）
+        
+        クエリと共通する n-gram（ひらがなだけのものを除く）が min_matches 種類に満たない文章は、
+        スコアが高くても返さない（「り方」や「について」のような重なりだけの文章を関連ありとしないため）。
+        """
+        scores, matches = self.scores_and_matches(query)
+        candidates = ((document_id, score) for document_id, score in scores.items()
+                      if score > min_score and matches.get(document_id, 0) >= min_matches)
+        return heapq.nlargest(limit, candidates, key=lambda item: (item[1], -item[0]))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import math
+import time
+import json
+import heapq
+import argparse
+
+from archive import ArticleArchive
+from atomic_write import atomic_write
+from similarity import shingles
+
+def markdown_paragraphs(lines):
+    """空行で区切られた段落を (先頭の行番号, 本文) で返す（各行の前後の空白は除く）"""
+    paragraphs = []
+    block, block_start = [], 0
+    for line_no, line in enumerate(lines + [''], 1):
+        if line.strip():
+            if not block:
+                block_start = line_no
+            block.append(line.strip())
+        elif block:
+            paragraphs.append((block_start, "\n".join(block)))
+            block = []
+    return paragraphs
+
+def read_passages(base_dir, path):
+    """ファイル（base_dir からの相対パス）を検索単位の (場所, 本文) に分ける"""
+    full_path = os.path.join(base_dir, path)
+    
+    # 過去記事は記事・セクション・段落の索引をそのまま使う
+    if path == "published-articles.txt":
+        archive = ArticleArchive(full_path, os.path.join(base_dir, ".cache", "archive-index.json"))
+        passages = []
+        for paragraph_id in range(len(archive)):
+            title, section_name, paragraph = archive.describe(paragraph_id)
+            passages.append((f"{path}【{title}】{section_name}", paragraph))
+        archive.close()
+        return passages
+    
+    with open(full_path, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+    
+    # 現在の考えは「・」の行ごと
+    if path == "current-thoughts.txt":
+        passages = []
+        category = ''
+        for line_no, line in enumerate(lines, 1):
+            stripped = line.strip()
+            if stripped.startswith('【'):
+                category = stripped
+            elif stripped.startswith('・'):
+                passages.append((f"{path}:{line_no}{category}", stripped[1:].strip()))
+        return passages
+    
+    # 生成済みのmarkdownは空行で区切られた段落ごと
+    return [(f"{path}:{line_no}", text) for line_no, text in markdown_paragraphs(lines)]
+
+def output_files(base_dir):
+    """生成済みの記事（output/ 以下の .md、base_dir からの相対パス）"""
+    paths = []
+    output_dir = os.path.join(base_dir, "output")
+    for root, _, filenames in os.walk(output_dir):
+        for filename in sorted(filenames):
+            if filename.endswith('.md'):
+                paths.append(os.path.relpath(os.path.join(root, filename), base_dir))
+    return paths
+
+class SearchIndex:
+    """過去記事・現在の考え・生成済み記事を文字2-gramで引く転置インデックス（ファイル単位で差分更新）"""
+    
+    INDEX_VERSION = 2
+    NGRAM = 2
+    
+    def __init__(self, base_dir="."):
+        self.base_dir = base_dir
+        self.index_file = os.path.join(base_dir, ".cache", "search-index.json")
+        self.files = {}         # 相対パス -> {'fingerprint', 'passages', 'postings'}
+        
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == self.INDEX_VERSION:
+                self.files = index['files']
+    
+    def source_files(self):
+        """検索対象のファイル（相対パス）"""
+        paths = [path for path in ("published-articles.txt", "current-thoughts.txt")
+                 if os.path.exists(os.path.join(self.base_dir, path))]
+        return paths + output_files(self.base_dir)
+    
+    def read_passages(self, path):
+        """ファイルを検索単位の (場所, 本文) に分ける"""
+        return read_passages(self.base_dir, path)
+    
+    def index_file_passages(self, path, fingerprint):
+        """1ファイル分の段落とn-gramの転置リストを作る"""
+        passages = self.read_passages(path)
+        postings = {}
+        for passage_id, (_, text) in enumerate(passages):
+            for gram in shingles(text, self.NGRAM):
+                postings.setdefault(gram, []).append(passage_id)
+        self.files[path] = {'fingerprint': fingerprint, 'passages': passages, 'postings': postings}
+    
+    def update(self):
+        """変更・追加されたファイルだけを索引し直す（変更があれば保存）"""
+        changed = 0
+        paths = self.source_files()
+        
+        for path in paths:
+            stat = os.stat(os.path.join(self.base_dir, path))
+            fingerprint = [stat.st_size, stat.st_mtime_ns]
+            if path not in self.files or self.files[path]['fingerprint'] != fingerprint:
+                self.index_file_passages(path, fingerprint)
+                changed += 1
+        
+        removed = set(self.files) - set(paths)
+        for path in removed:
+            del self.files[path]
+        
+        if changed or removed:
+            atomic_write(self.index_file, json.dumps({'version': self.INDEX_VERSION, 'files': self.files},
+                                                     ensure_ascii=False))
+        
+        return changed, len(removed)
+    
+    def search(self, query, limit=10):
+        """クエリに近い段落を (スコア, 場所, 本文) の順位付きで返す"""
+        grams = shingles(query, self.NGRAM)
+        if not grams:
+            return []
+        
+        # 段落の総数と各n-gramの出現段落数からIDFを計算
+        total = sum(len(entry['passages']) for entry in self.files.values()) or 1
+        document_frequency = {gram: sum(len(entry['postings'].get(gram, ())) for entry in self.files.values())
+                              for gram in grams}
+        idf = {gram: math.log(1 + total / df) for gram, df in document_frequency.items() if df}
+        if not idf:
+            return []
+        # クエリのn-gramの重みの半分以上を含む段落だけを候補にする
+        threshold = sum(idf.values()) / 2
+        exact_bonus = sum(idf.values())
+        
+        hits = []
+        for path, entry in self.files.items():
+            scores = {}
+            for gram, weight in idf.items():
+                for passage_id in entry['postings'].get(gram, ()):
+                    scores[passage_id] = scores.get(passage_id, 0.0) + weight
+            for passage_id, score in scores.items():
+                if score < threshold:
+                    continue
+                location, text = entry['passages'][passage_id]
+                # クエリをそのまま含む段落を優先
+                if query in text:
+                    score += exact_bonus
+                hits.append((score, location, text))
+        
+        # 同点なら短い（クエリが占める割合の大きい）段落を上位にする
+        return heapq.nlargest(limit, hits, key=lambda hit: (hit[0], -len(hit[2])))
+
+def main():
+    parser = argparse.ArgumentParser(description="過去記事・現在の考え・生成済み記事を全文検索")
+    parser.add_argument('query', help="検索したい言葉（2文字以上）")
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    index = SearchIndex()
+    changed, removed = index.update()
+    indexed = time.perf_counter()
+    hits = index.search(args.query, args.limit)
+    searched = time.perf_counter()
+    
+    for score, location, text in hits:
+        snippet = text.replace('\n', ' ')
+        if len(snippet) > 80:
+            snippet = snippet[:80] + '…'
+        print(f"[{score:.1f}] {location}")
+        print(f"    {snippet}")
+    
+    print(f"{len(hits)}件（検索 {(searched - indexed) * 1000:.1f}ミリ秒、"
+          f"索引の更新 {changed}ファイル {(indexed - started) * 1000:.1f}ミリ秒）")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""記事生成の常駐サーバー
+
+IshiharaArticleGenerator を1つ起動したままにしておき、考えのインデックス・変換ルール・
+テンプレート・過去記事の索引をメモリに保持する。入力ファイルは更新時刻が変わった時だけ
+読み直すので、エディタなどから毎回インタープリタを起動せずに下書きを取得できる。
+
+    GET  /health                                  状態と読み込み済みのプラットフォーム
+    GET  /draft?topic=...&platform=...&seed=...   下書きを生成して返す（保存しない）
+    POST /draft     {"topic", "platform", "seed"}            同上（JSON）
+    POST /generate  {"topic", "platform", "seed", "force"}   生成して output/ に保存
+
+使用方法: python server.py [--host 127.0.0.1] [--port 8765] [--socket PATH] [--with-archive] [--persist-cache] [--db PATH]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from generate import IshiharaArticleGenerator
+
+class GenerationService:
+    """常駐するジェネレーターと、それを守るロック"""
+    
+    def __init__(self, generator):
+        self.generator = generator
+        # ジェネレーターのキャッシュやインデックスはスレッドセーフではないので、生成は1件ずつ行う
+        # （1件あたり数ミリ秒以下なので、受け付けと応答の送信だけが並行に進めば十分）
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests = 0
+    
+    def warm_up(self):
+        """起動時に入力の読み込み・インデックス構築・テンプレートのコンパイルを済ませておく"""
+        generator = self.generator
+        current_thoughts = generator.load_current_thoughts()
+        generator.load_style_guide()
+        if current_thoughts:
+            generator.get_thought_index(current_thoughts)
+        for platform in generator.PLATFORMS:
+            generator.templates.get(platform)
+        if generator.use_archive:
+            generator.get_archive()
+    
+    def refresh(self):
+        reloaded = self.generator.refresh_inputs()
+        if reloaded:
+            print(f"読み直しました: {', '.join(reloaded)}")
+    
+    def draft(self, topic, platform, seed=None):
+        """下書きを生成して返す（ファイルには保存しない）"""
+        started = time.perf_counter()
+        with self.lock:
+            self.requests += 1
+            self.refresh()
+            generator = self.generator
+            current_thoughts = generator.load_current_thoughts()
+            relevant_thoughts = generator.extract_relevant_thoughts(topic, current_thoughts)
+            past_paragraphs = generator.find_past_paragraphs(topic, current_thoughts)
+            content = generator.render_article(topic, platform, relevant_thoughts, seed, past_paragraphs)
+        return {
+            'topic': topic,
+            'platform': platform,
+            'content': content,
+            'chars': len(content),
+            'relevant_thoughts': len(relevant_thoughts),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+    
+    def generate(self, topic, platform, seed=None, force=False):
+        """記事を生成して output/ に保存（入力が同じなら生成済みの記事を返す）"""
+        started = time.perf_counter()
+        with self.lock:
+            self.requests += 1
+            self.refresh()
+            filepath, char_count, reused, relevant_thoughts = self.generator.build_article(topic, platform, seed, force)
+        return {
+            'topic': topic,
+            'platform': platform,
+            'path': filepath,
+            'chars': char_count,
+            'reused': reused,
+            'relevant_thoughts': len(relevant_thoughts),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+    
+    def health(self):
+        return {
+            'status': 'ok',
+            'platforms': list(self.generator.PLATFORMS),
+            'archive': self.generator.use_archive,
+            'requests': self.requests,
+            'uptime_seconds': round(time.time() - self.started_at, 1)
+        }
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """JSONで要求を受けて、JSONで結果を返す"""
+    
+    server_version = "IshiharaGenerator/1.0"
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            self.send_json(200, self.server.service.health())
+        elif url.path == '/draft':
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self.handle_generation('draft', params)
+        else:
+            self.send_json(404, {'error': f"不明なパスです: {url.path}"})
+    
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path not in ('/draft', '/generate'):
+            self.send_json(404, {'error': f"不明なパスです: {url.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            params = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        except (ValueError, UnicodeDecodeError) as e:
+            self.send_json(400, {'error': f"JSONを読み取れません: {e}"})
+            return
+        if not isinstance(params, dict):
+            self.send_json(400, {'error': "JSONはオブジェクトで指定してください"})
+            return
+        self.handle_generation(url.path[1:], params)
+    
+    def handle_generation(self, action, params):
+        service = self.server.service
+        topic = str(params.get('topic') or '').strip()
+        platform = str(params.get('platform') or '').strip()
+        seed = params.get('seed')
+        if not topic:
+            self.send_json(400, {'error': "topic を指定してください"})
+            return
+        if platform not in service.generator.PLATFORMS:
+            platforms = ', '.join(service.generator.PLATFORMS)
+            self.send_json(400, {'error': f"platform は {platforms} のいずれかを指定してください"})
+            return
+        
+        seed = None if seed is None else str(seed)
+        if action == 'draft':
+            result = service.draft(topic, platform, seed)
+        else:
+            result = service.generate(topic, platform, seed, force=bool(params.get('force')))
+        self.send_json(200, result)
+    
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def address_string(self):
+        # Unixソケットでは接続元のアドレスがない
+        return self.client_address[0] if self.client_address else 'unix'
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unixソケットで待ち受けるHTTPサーバー"""
+    
+    daemon_threads = True
+
+def make_server(service, host='127.0.0.1', port=8765, socket_path=None, verbose=False):
+    """TCP（既定）またはUnixソケットで待ち受けるサーバーを作る"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, RequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="記事生成の常駐サーバー")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', metavar='PATH', help="TCPの代わりにUnixソケットで待ち受ける")
+    parser.add_argument('--with-archive', action='store_true', help="過去記事の段落を引用する")
+    parser.add_argument('--persist-cache', action='store_true', help="展開キャッシュを終了時に保存する")
+    parser.add_argument('--db', metavar='PATH', help="現在の考えを organize.py --db で保存したSQLiteから読む")
+    parser.add_argument('--verbose', action='store_true', help="リクエストごとにログを表示")
+    args = parser.parse_args()
+    
+    generator = IshiharaArticleGenerator(use_archive=args.with_archive, persist_cache=args.persist_cache,
+                                         db_file=args.db)
+    service = GenerationService(generator)
+    
+    started = time.perf_counter()
+    service.warm_up()
+    print(f"準備ができました（{(time.perf_counter() - started) * 1000:.1f}ミリ秒）")
+    
+    try:
+        server = make_server(service, args.host, args.port, args.socket, args.verbose)
+    except OSError as e:
+        print(f"エラー: 待ち受けを開始できません: {e}")
+        sys.exit(1)
+    
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"待ち受け中: {where}（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n終了します")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+        generator.save_caches()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import hashlib
+import functools
+import itertools
+
+# 類似度の計算では空白と記号を無視する
+_IGNORED = re.compile(r'[\s、。，．,.!！?？「」『』（）()・…〜~\-]+')
+
+# ひらがなだけのn-gram（「につ」「いて」のように助詞や活用語尾でできていることが多い）
+_HIRAGANA = re.compile(r'[\u3041-\u309f]+')
+
+# SimHashのビット数と、ビットごとの集計に使う整数内の区画の幅
+# （1つの大きな整数を64区画に分け、n-gramのハッシュを区画ごとの0/1に広げて足し合わせる）
+SIMHASH_BITS = 64
+_LANE_BITS = 24
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD = str.maketrans({'0': '0' * _LANE_BITS, '1': '0' * (_LANE_BITS - 1) + '1'})
+
+def shingles(text, n=2):
+    """文字n-gramの集合（単語の区切りがない日本語向け）"""
+    text = _IGNORED.sub('', text)
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def ngram_counts(text, n=2):
+    """文字n-gramごとの出現回数（shingles と同じく空白と記号は無視する）"""
+    text = _IGNORED.sub('', text)
+    if len(text) <= n:
+        return {text: 1} if text else {}
+    counts = {}
+    for i in range(len(text) - n + 1):
+        gram = text[i:i + n]
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+def is_hiragana(gram):
+    """ひらがなだけでできたn-gramか（内容を表す漢字・カタカナ・英数字を含まない）"""
+    return _HIRAGANA.fullmatch(gram) is not None
+
+@functools.lru_cache(maxsize=65536)
+def _spread_hash(gram):
+    """n-gramの64ビットハッシュを、ビットごとに1区画ずつ広げた整数"""
+    digest = hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest()
+    bits = format(int.from_bytes(digest, 'big'), f'0{SIMHASH_BITS}b')
+    return int(bits.translate(_SPREAD), 2)
+
+def simhash(text, n=2):
+    """文字n-gramの出現回数で重み付けした64ビットのSimHash（似た文章ほどハミング距離が小さい）"""
+    counts = ngram_counts(text, n)
+    total = sum(counts.values())
+    if not total or total > _LANE_MASK:
+        return 0
+    
+    # 区画ごとに「そのビットが1のn-gramの出現回数」を1回の足し算でまとめて集計する
+    accumulated = 0
+    for gram, count in counts.items():
+        accumulated += count * _spread_hash(gram)
+    
+    # 半数を超えるn-gramで1だったビットを1にする
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if 2 * ((accumulated >> (bit * _LANE_BITS)) & _LANE_MASK) > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def hamming(fingerprint1, fingerprint2):
+    return (fingerprint1 ^ fingerprint2).bit_count()
+
+def jaccard(shingles1, shingles2):
+    """2つのn-gram集合のJaccard係数"""
+    if not shingles1 or not shingles2:
+        return 0.0
+    return len(shingles1 & shingles2) / len(shingles1 | shingles2)
+
+class SimHashIndex:
+    """SimHashを16ビットのブロックに分けた多重索引で、ハミング距離の近い指紋を総当たりせずに探す
+    
+    64ビットを m 個のブロックに分けると、距離が max_distance 以下の指紋どうしは鳩の巣原理で
+    少なくとも1つのブロックの距離が max_distance // m 以下になる。ブロックごとに、そのビット数以内で
+    変えたキーのバケットだけを調べれば取りこぼしはない（距離10・16ビット×4なら、各ブロックで
+    2ビット以内の137通りのキー）。キーの幅を保つので、バケットの中身は索引が大きくなっても少ない。
+    """
+    
+    def __init__(self, max_distance=3, block_bits=16):
+        self.max_distance = max_distance
+        
+        # 64ビットを block_bits ずつのブロックに分ける（端数は最後のブロックに入れる）
+        blocks = max(1, SIMHASH_BITS // block_bits)
+        self._blocks = []   # (シフト量, マスク)
+        for block in range(blocks):
+            width = block_bits if block < blocks - 1 else SIMHASH_BITS - block_bits * (blocks - 1)
+            self._blocks.append((block * block_bits, (1 << width) - 1))
+        
+        # 各ブロックで調べる、radius ビット以内の反転パターン
+        radius = max_distance // blocks
+        self._flips = [[0] for _ in self._blocks]
+        for flips, (_, mask) in zip(self._flips, self._blocks):
+            width = mask.bit_length()
+            for bits in range(1, min(radius, width) + 1):
+                flips.extend(sum(1 << bit for bit in positions)
+                             for positions in itertools.combinations(range(width), bits))
+        
+        self._buckets = [{} for _ in self._blocks]
+        self._fingerprints = set()
+    
+    def __len__(self):
+        return len(self._fingerprints)
+    
+    def _block_keys(self, fingerprint):
+        return [(fingerprint >> shift) & mask for shift, mask in self._blocks]
+    
+    def add(self, fingerprint):
+        """指紋を登録（同じ指紋は1回だけ）"""
+        if fingerprint in self._fingerprints:
+            return
+        self._fingerprints.add(fingerprint)
+        for bucket, block_key in zip(self._buckets, self._block_keys(fingerprint)):
+            bucket.setdefault(block_key, []).append(fingerprint)
+    
+    def _candidates(self, fingerprint):
+        """どれかのブロックが近いキーに入っている指紋"""
+        candidates = set()
+        for bucket, flips, block_key in zip(self._buckets, self._flips, self._block_keys(fingerprint)):
+            get = bucket.get
+            for flip in flips:
+                found = get(block_key ^ flip)
+                if found:
+                    candidates.update(found)
+        return candidates
+    
+    def query(self, fingerprint):
+        """登録済みの指紋のうち、ハミング距離が max_distance 以下のものを (指紋, 距離) の近い順に返す"""
+        matches = [(candidate, hamming(fingerprint, candidate)) for candidate in self._candidates(fingerprint)]
+        return sorted((match for match in matches if match[1] <= self.max_distance),
+                      key=lambda match: (match[1], match[0]))
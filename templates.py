@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""記事テンプレートの読み込みとコンパイル
+
+テンプレートは templates/<プラットフォーム>.tmpl に置く1行1段落のテキストで、
+次の書き方ができる。
+
+    @if topic has プロテイン        条件分岐（「A|B」はどれかを含む）。@elif / @else / @end
+    @if thoughts                    値が空でなければ
+    @each thought in thoughts[:3]   繰り返し（{index} に1からの番号が入る）。@end まで
+    @set problem = 「{topic}とは」   変数の設定
+    @# コメント
+
+    {topic}                         変数
+    {topic|remove:の}               変数から文字を取り除く
+    {paragraph.text}                辞書の要素
+    {expr:opening}                  表現パターンから1つ選ぶ
+    {expr:problem_introduction|topic={topic}の悩み}
+                                    表現パターンの {topic} を埋めて選ぶ
+    {title(thought)}                登録した関数を呼ぶ
+"""
+
+import os
+import re
+import hashlib
+
+from profiling import profiler
+
+TEMPLATE_SUFFIX = '.tmpl'
+
+_EACH = re.compile(r'^(\w+) in (\w+)(?:\[:(\d+)\])?$')
+_SET = re.compile(r'^(\w+) = (.*)$')
+_CALL = re.compile(r'^(\w+)\((\w+)\)$')
+_VARIABLE = re.compile(r'^(\w+)(?:\.(\w+))?(?:\|remove:(.+))?$')
+
+class TemplateError(Exception):
+    """テンプレートの書き方の誤り"""
+
+def available_platforms(template_dir):
+    """テンプレートが用意されているプラットフォーム名"""
+    if not os.path.isdir(template_dir):
+        return []
+    return sorted(name[:-len(TEMPLATE_SUFFIX)] for name in os.listdir(template_dir)
+                  if name.endswith(TEMPLATE_SUFFIX))
+
+def _split_slots(text):
+    """1行を 文字列 と {スロット} の並びに分ける（スロットは入れ子にできる）"""
+    parts = []
+    literal = []
+    i = 0
+    while i < len(text):
+        if text[i] != '{':
+            literal.append(text[i])
+            i += 1
+            continue
+        depth = 0
+        for j in range(i, len(text)):
+            depth += {'{': 1, '}': -1}.get(text[j], 0)
+            if depth == 0:
+                break
+        else:
+            raise TemplateError(f"閉じていない {{ があります: {text}")
+        if literal:
+            parts.append(''.join(literal))
+            literal = []
+        parts.append((text[i + 1:j],))
+        i = j + 1
+    if literal:
+        parts.append(''.join(literal))
+    return parts
+
+class TemplateEngine:
+    """テンプレートをPythonの描画関数にコンパイルして保持する"""
+    
+    def __init__(self, template_dir, expressions, functions):
+        self.template_dir = template_dir
+        self.expressions = expressions
+        self.functions = functions
+        self._compiled = {}
+        self._digests = {}
+        self._mtimes = {}
+    
+    def platforms(self):
+        return available_platforms(self.template_dir)
+    
+    def get(self, platform):
+        """プラットフォームの描画関数の組（一括, 逐次）を返す（初回のみコンパイル）"""
+        if platform not in self._compiled:
+            path = self.path(platform)
+            self._mtimes[platform] = os.stat(path).st_mtime_ns
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+            self._compiled[platform] = self.compile(source, path)
+            self._digests[platform] = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+        return self._compiled[platform]
+    
+    def path(self, platform):
+        return os.path.join(self.template_dir, platform + TEMPLATE_SUFFIX)
+    
+    def refresh(self):
+        """書き換えられたテンプレートを捨て、次に使う時にコンパイルし直す。捨てたプラットフォームを返す"""
+        changed = []
+        for platform, mtime in list(self._mtimes.items()):
+            path = self.path(platform)
+            if not os.path.exists(path) or os.stat(path).st_mtime_ns != mtime:
+                del self._compiled[platform], self._digests[platform], self._mtimes[platform]
+                changed.append(platform)
+        return changed
+    
+    def digest(self, platform):
+        """テンプレートの内容のハッシュ（テンプレートを書き換えると変わる）"""
+        self.get(platform)
+        return self._digests[platform]
+    
+    def render(self, platform, context, rng):
+        """記事を描画（各行を改行でつないだ文字列）"""
+        return self.get(platform)[0](context, rng)
+    
+    def stream(self, platform, context, rng):
+        """記事を文字列の断片として順に返す（つなぐと render と同じ内容になる）"""
+        chunks = self.get(platform)[1](context, rng)
+        previous = next(chunks, None)
+        for chunk in chunks:
+            yield previous
+            previous = chunk
+        # 各行の末尾に改行を出しているので、最後の1つだけ取り除く
+        if previous is not None:
+            yield previous[:-1]
+    
+    # --- コンパイル ---
+    
+    @profiler.timed('compile_template')
+    def compile(self, source, filename='<template>'):
+        """テンプレートを、固定の文字列をまとめたPythonの関数に変換してコンパイル
+        
+        一括で文字列を返す関数と、断片を順に返すジェネレーターの組を返す。
+        """
+        lines = source.split('\n')
+        if lines and lines[-1] == '':
+            lines.pop()
+        
+        self._code = []
+        self._literal = []
+        self._depth = 1
+        position = self._compile_block(lines, 0)
+        if position < len(lines):
+            raise TemplateError(f"対応する @if / @each がない行があります（{position + 1}行目）: {lines[position]}")
+        self._flush()
+        
+        render = ["def render(context, rng):",
+                  "    _out = []",
+                  "    _emit = _out.append",
+                  "    topic = context['topic']"]
+        render += self._code
+        # 各行の末尾に改行を出しているので、最後の1つだけ取り除く
+        render.append("    return ''.join(_out)[:-1]")
+        
+        # 逐次版は出力を yield に置き換えたジェネレーター
+        stream = ["def stream(context, rng):",
+                  "    topic = context['topic']"]
+        stream += [line.replace('_emit(', 'yield (', 1) if line.lstrip().startswith('_emit(') else line
+                   for line in self._code]
+        
+        namespace = {'_expressions': {name: tuple(choices) for name, choices in self.expressions.items()},
+                     '_functions': self.functions}
+        exec(compile("\n".join(render + stream), filename, 'exec'), namespace)
+        return namespace['render'], namespace['stream']
+    
+    def _line(self, statement):
+        self._code.append('    ' * self._depth + statement)
+    
+    def _flush(self):
+        """たまった固定の文字列を1回の出力にまとめる"""
+        if self._literal:
+            self._line(f"_emit({''.join(self._literal)!r})")
+            self._literal = []
+    
+    def _compile_block(self, lines, position):
+        """@elif / @else / @end か末尾までの行をコンパイルし、止まった位置を返す"""
+        start_depth = len(self._code)
+        while position < len(lines):
+            line = lines[position]
+            if not line.startswith('@'):
+                for part in _split_slots(line) + ['\n']:
+                    if isinstance(part, str):
+                        self._literal.append(part)
+                    else:
+                        self._flush()
+                        self._line(f"_emit({self._compile_slot(part[0])})")
+                position += 1
+                continue
+            
+            directive, _, argument = line[1:].partition(' ')
+            argument = argument.strip()
+            if directive in ('elif', 'else', 'end'):
+                break
+            if directive == '#':
+                position += 1
+                continue
+            
+            self._flush()
+            if directive == 'if':
+                position = self._compile_if(lines, position, argument)
+            elif directive == 'each':
+                position = self._compile_each(lines, position, argument)
+            elif directive == 'set':
+                match = _SET.match(argument)
+                if not match:
+                    raise TemplateError(f"@set の書き方が正しくありません: {line}")
+                self._line(f"context[{match.group(1)!r}] = {self._compile_text(match.group(2))}")
+                position += 1
+            else:
+                raise TemplateError(f"不明な命令です: {line}")
+        
+        self._flush()
+        if len(self._code) == start_depth:
+            self._line("pass")
+        return position
+    
+    def _compile_if(self, lines, position, argument):
+        self._line(f"if {self._compile_condition(argument)}:")
+        while True:
+            self._depth += 1
+            position = self._compile_block(lines, position + 1)
+            self._depth -= 1
+            if position >= len(lines):
+                raise TemplateError("@if が @end で閉じられていません")
+            directive, _, argument = lines[position][1:].partition(' ')
+            if directive == 'end':
+                return position + 1
+            if directive == 'elif':
+                self._line(f"elif {self._compile_condition(argument.strip())}:")
+            else:
+                self._line("else:")
+    
+    def _compile_each(self, lines, position, argument):
+        match = _EACH.match(argument)
+        if not match:
+            raise TemplateError(f"@each の書き方が正しくありません: {lines[position]}")
+        name, source, limit = match.groups()
+        items = f"(context.get({source!r}) or ())" + (f"[:{int(limit)}]" if limit else "")
+        self._line(f"for context['index'], context[{name!r}] in enumerate({items}, 1):")
+        self._depth += 1
+        position = self._compile_block(lines, position + 1)
+        self._depth -= 1
+        if position >= len(lines) or lines[position] != '@end':
+            raise TemplateError("@each が @end で閉じられていません")
+        return position + 1
+    
+    def _compile_condition(self, text):
+        subject, _, needles = text.partition(' has ')
+        subject = subject.strip()
+        if needles:
+            return ' or '.join(f"{needle!r} in context[{subject!r}]" for needle in needles.strip().split('|'))
+        return f"context.get({subject!r})"
+    
+    def _compile_text(self, text):
+        """スロットを含む文字列を、それを組み立てる式にする"""
+        parts = [repr(part) if isinstance(part, str) else self._compile_slot(part[0])
+                 for part in _split_slots(text)]
+        if not parts:
+            return "''"
+        return parts[0] if len(parts) == 1 else f"''.join(({', '.join(parts)},))"
+    
+    def _compile_slot(self, slot):
+        """{...} の中身を、文字列を返す式にする"""
+        if slot.startswith('expr:'):
+            name, _, argument = slot[len('expr:'):].partition('|')
+            if name not in self.expressions:
+                raise TemplateError(f"表現パターンがありません: {name}")
+            choice = f"rng.choice(_expressions[{name!r}])"
+            if not argument:
+                return choice
+            key, _, value = argument.partition('=')
+            return f"{choice}.format({key.strip()}={self._compile_text(value)})"
+        
+        match = _CALL.match(slot)
+        if match:
+            if match.group(1) not in self.functions:
+                raise TemplateError(f"関数が登録されていません: {match.group(1)}")
+            return f"_functions[{match.group(1)!r}](context[{match.group(2)!r}])"
+        
+        match = _VARIABLE.match(slot)
+        if not match:
+            raise TemplateError(f"不明なスロットです: {{{slot}}}")
+        name, key, removed = match.groups()
+        if key:
+            return f"str(context[{name!r}][{key!r}])"
+        if removed:
+            return f"str(context[{name!r}]).replace({removed!r}, '')"
+        return f"str(context[{name!r}])"
@@ -0,0 +1,32 @@
+from evolution_store import EvolutionStore, append_new_entries, render_text_log
+
+def change(date, previous, current):
+    return {'date': date, 'category': "睡眠", 'previous': previous, 'current': current,
+            'change_type': "考えの更新"}
+
+def test_append_new_entries_matches_add_many(tmp_path):
+    path = str(tmp_path / "evolution-log.jsonl")
+    first = [change("2025-01-27", "睡眠不足のお客様が多い", "睡眠が大事")]
+    second = first + [change("2025-01-28", "睡眠が大事", "寝る前のスマホをやめた"),
+                      change("2025-01-28", "睡眠が大事", "寝る前のスマホをやめた")]
+    
+    added, last_recorded_at = append_new_entries(path, first, recorded_at="2025-01-27 10:00")
+    assert len(added) == 1 and last_recorded_at is None
+    text = render_text_log(added)
+    
+    # 記録済みの変化と、同じ回の中の重複は追記しない
+    added, last_recorded_at = append_new_entries(path, second, recorded_at="2025-01-28 10:00")
+    assert [entry['current'] for entry in added] == ["寝る前のスマホをやめた"]
+    assert last_recorded_at == "2025-01-27 10:00"
+    text += render_text_log(added, last_recorded_at)
+    
+    store = EvolutionStore(path)
+    assert len(store) == 2
+    assert text == store.render_text()
+
+def test_render_text_log_continues_same_recorded_at():
+    entries = [dict(change("2025-01-2%d" % day, "前", "後%d" % day), recorded_at="2025-01-28 10:00")
+               for day in range(3)]
+    text = render_text_log(entries[:1]) + render_text_log(entries[1:], "2025-01-28 10:00")
+    assert text == render_text_log(entries)
+    assert text.count("=== 考えの変化履歴") == 1
@@ -0,0 +1,34 @@
+import pytest
+
+from generate import IshiharaArticleGenerator
+
+CURRENT_THOUGHTS = """=== 石原トレーナーの現在の考え・哲学 ===
+最終更新: 2025-01-28 10:00
+
+【筋トレ・頻度】
+・筋トレ頻度について質問された
+・体験レッスンで「トレーニングって辛いイメージが」って言われた
+
+【姿勢改善】
+・反り腰の改善について相談された
+
+【ダイエット】
+・「過去に何度もダイエットに失敗してます」って言われた
+"""
+
+@pytest.fixture
+def generator(tmp_path):
+    return IshiharaArticleGenerator(str(tmp_path))
+
+@pytest.mark.parametrize('topic', ["腸活について", "ランニングについて", "ヨガについて考える", "水分補給について",
+                                   "ビタミンCの摂り方", "全く無関係な話題"])
+def test_fallback_ignores_unrelated_topics(generator, topic):
+    # 「について」のようなひらがなだけの重なりでは関連ありとしない
+    assert generator.extract_relevant_thoughts(topic, CURRENT_THOUGHTS) == []
+
+@pytest.mark.parametrize('topic, thought', [
+    ("ダイエットの停滞期", "「過去に何度もダイエットに失敗してます」って言われた"),
+    ("体験レッスン", "体験レッスンで「トレーニングって辛いイメージが」って言われた"),
+])
+def test_fallback_finds_related_thoughts(generator, topic, thought):
+    assert generator.extract_relevant_thoughts(topic, CURRENT_THOUGHTS) == [thought]
@@ -0,0 +1,79 @@
+import json
+import shutil
+
+import pytest
+
+from organize import IshiharaNotesOrganizer
+from notes_db import NotesDatabase
+from evolution_store import EvolutionStore
+
+RAW_NOTES = """2025-01-28
+お客様から「プロテイン美味しくて続けられる」と言われた
+筋トレ頻度について質問された
+睡眠とボディメイクの関係もっと発信したほうがいいかも
+
+2025-01-27
+反り腰の改善について相談された
+睡眠不足のお客様が多い
+食事の記録をつけてもらうことにした
+
+2025-01-26
+猫背改善のエクササイズを教えた
+週2回のトレーニングで十分って伝えた
+"""
+
+# 既存のメモに対する書き足し方ごとの (先頭に足す文字列, 末尾に足す文字列)
+UPDATES = {
+    'prepend': ("2025-01-29\nプロテインより食事が先\n睡眠が大事って話をした\n\n", ""),
+    'append_newer': ("", "\n2025-01-29\nプロテインより食事が先\n睡眠が大事って話をした\n"),
+    'back_fill': ("", "\n2025-01-20\nサプリの相談を受けた\n寝る前のスマホをやめたら睡眠が深くなった\n"),
+    'same_date': ("", "デスクワークで姿勢が崩れやすいお客様\n"),
+}
+
+def run(base_dir, incremental, db=False):
+    db_file = str(base_dir / "notes.sqlite3") if db else None
+    IshiharaNotesOrganizer(str(base_dir), db_file=db_file).organize(incremental=incremental)
+
+def outputs(base_dir):
+    """現在の考え（更新時刻の行を除く）と変化履歴（記録時刻を除く）"""
+    with open(base_dir / "current-thoughts.txt", encoding='utf-8') as f:
+        thoughts = [line for line in f.read().split('\n') if not line.startswith("最終更新: ")]
+    if (base_dir / "notes.sqlite3").exists():
+        entries = NotesDatabase(str(base_dir / "notes.sqlite3")).query_evolution()
+    else:
+        with open(base_dir / "evolution-log.jsonl", encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    for entry in entries:
+        del entry['recorded_at']
+    return thoughts, entries
+
+def text_view_is_current(base_dir):
+    """evolution-log.txtが、ストア（データベース）全体から描画し直した内容と同じか"""
+    with open(base_dir / "evolution-log.txt", encoding='utf-8') as f:
+        text = f.read()
+    if (base_dir / "notes.sqlite3").exists():
+        return text == NotesDatabase(str(base_dir / "notes.sqlite3")).export_evolution_log()
+    return text == EvolutionStore(str(base_dir / "evolution-log.jsonl")).render_text()
+
+@pytest.mark.parametrize('db', [False, True])
+@pytest.mark.parametrize('update', sorted(UPDATES))
+def test_incremental_matches_full_run(tmp_path, capsys, update, db):
+    incremental_dir = tmp_path / "incremental"
+    full_dir = tmp_path / "full"
+    incremental_dir.mkdir()
+    (incremental_dir / "raw-notes.txt").write_text(RAW_NOTES, encoding='utf-8')
+    run(incremental_dir, incremental=False, db=db)
+    shutil.copytree(incremental_dir, full_dir)
+    
+    head, tail = UPDATES[update]
+    for base_dir in (incremental_dir, full_dir):
+        (base_dir / "raw-notes.txt").write_text(head + RAW_NOTES + tail, encoding='utf-8')
+    run(incremental_dir, incremental=True, db=db)
+    run(full_dir, incremental=False, db=db)
+    
+    assert "全てのメモを解析します" not in capsys.readouterr().out
+    assert outputs(incremental_dir) == outputs(full_dir)
+    assert text_view_is_current(incremental_dir)
+    if db:
+        assert (NotesDatabase(str(incremental_dir / "notes.sqlite3")).query_notes()
+                == NotesDatabase(str(full_dir / "notes.sqlite3")).query_notes())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from matcher import KeywordMatcher
+from relevance import TfidfIndex
+
+def iter_thoughts(current_thoughts):
+    """current-thoughts.txtの内容から (【カテゴリ】, 考え) を順に返す（「・」は除去済み）"""
+    category = None
+    for line in current_thoughts.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('【') and stripped.endswith('】'):
+            category = stripped[1:-1]
+        elif stripped.startswith('・'):
+            yield category, stripped[1:].strip()
+
+class ThoughtIndex:
+    """current-thoughts.txtの考え（「・」行）をキーワードから引く転置インデックス"""
+    
+    def __init__(self, current_thoughts, topic_keywords, records=None):
+        """records に (カテゴリ, 考え) の並びを渡すと、テキストを解析せずにそれを使う（SQLiteから読んだ時など）"""
+        self.source = current_thoughts
+        self.topic_keywords = topic_keywords
+        self.thoughts = []      # 考えID -> 本文（「・」を除去済み）
+        self.categories = []    # 考えID -> 所属する【カテゴリ】
+        self.postings = {}      # キーワード -> 考えIDのリスト（昇順）
+        self._topic_cache = {}
+        self._ranked_cache = {}
+        self._tfidf = None      # 初めて順位付けする時に構築する
+        
+        # キーワードの照合はオートマトンで1行1回の走査にまとめる
+        keywords = {keyword for group in topic_keywords.values() for keyword in group}
+        self.keyword_matcher = KeywordMatcher(keywords)
+        
+        # テーマ側は、グループ名かキーワードのどれかを含めばそのグループに該当
+        group_tokens = {}
+        for group_id, (key, group) in enumerate(topic_keywords.items()):
+            for token in [key] + group:
+                group_tokens.setdefault(token, set()).add(group_id)
+        self.topic_matcher = KeywordMatcher({token: frozenset(ids) for token, ids in group_tokens.items()})
+        self._groups = list(topic_keywords.values())
+        
+        if records is None:
+            records = iter_thoughts(current_thoughts)
+        
+        # インデックスの構築は考えを1回走査するだけ
+        for category, thought in records:
+            thought_id = len(self.thoughts)
+            self.thoughts.append(thought)
+            self.categories.append(category)
+            for keyword in self.keyword_matcher.find(thought):
+                self.postings.setdefault(keyword, []).append(thought_id)
+    
+    def keywords_for_topic(self, topic):
+        """テーマに最も近いキーワードセットを見つける"""
+        if topic not in self._topic_cache:
+            group_ids = set()
+            for ids in self.topic_matcher.find(topic):
+                group_ids.update(ids)
+            relevant_keywords = []
+            for group_id in sorted(group_ids):
+                relevant_keywords.extend(self._groups[group_id])
+            self._topic_cache[topic] = relevant_keywords
+        return self._topic_cache[topic]
+    
+    def lookup_ids(self, topic):
+        """テーマに関連する考えIDを、ファイル内の順番で返す"""
+        thought_ids = set()
+        for keyword in self.keywords_for_topic(topic):
+            thought_ids.update(self.postings.get(keyword, ()))
+        return sorted(thought_ids)
+    
+    def lookup(self, topic):
+        """テーマに関連する考えを、ファイル内の順番で返す"""
+        return [self.thoughts[thought_id] for thought_id in self.lookup_ids(topic)]
+    
+    def tfidf(self):
+        """考えの文字2-gramのTF-IDF索引（初回のみ構築）"""
+        if self._tfidf is None:
+            self._tfidf = TfidfIndex(self.thoughts)
+        return self._tfidf
+    
+    def ranked_ids(self, topic, limit=5, min_score=0.1, min_matches=3):
+        """テーマに関連する考えIDを、関連の強い順に返す
+        
+        キーワードに一致した考えは全てテーマとのTF-IDFの類似度の順に（同点はファイル内の順番で）並べる。
+        どのキーワードグループにも当てはまらないテーマは、類似度が min_score を超え、テーマと共通する
+        文字2-gram（ひらがなだけのものを除く）が min_matches 種類以上ある考えの上位 limit 件を返す（なければ空）。
+        """
+        key = (topic, limit, min_score, min_matches)
+        if key not in self._ranked_cache:
+            thought_ids = self.lookup_ids(topic)
+            if thought_ids:
+                scores = self.tfidf().scores(topic)
+                thought_ids.sort(key=lambda thought_id: -scores.get(thought_id, 0.0))
+            else:
+                thought_ids = [thought_id for thought_id, _ in self.tfidf().top(topic, limit, min_score, min_matches)]
+            self._ranked_cache[key] = thought_ids
+        return self._ranked_cache[key]
+    
+    def ranked(self, topic, limit=5, min_score=0.1, min_matches=3):
+        """テーマに関連する考えを、関連の強い順に返す"""
+        return [self.thoughts[thought_id] for thought_id in self.ranked_ids(topic, limit, min_score, min_matches)]
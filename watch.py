@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""raw-notes.txt の更新を監視して、整理と記事の作り直しを続けて行う（organize.py --watch）
+
+ファイルの更新時刻とサイズを短い間隔で確認し、保存が落ち着いてから（連続した保存は
+1回にまとめて）差分の整理を行い、使う考えが変わった記事だけを作り直す。
+整理する側・生成する側とも起動したままにしておき、チェックポイント・考えのインデックス・
+テンプレートなどはメモリに保持して使い回す。
+"""
+
+import os
+import time
+
+from generate import IshiharaArticleGenerator
+
+class NotesWatcher:
+    """raw-notes.txt の更新を待ち、差分の整理と記事の作り直しを行う"""
+    
+    # 更新を確認する間隔と、最後の更新から処理を始めるまで待つ時間（秒）
+    INTERVAL = 0.1
+    DEBOUNCE = 0.2
+    
+    def __init__(self, organizer, generator, interval=INTERVAL, debounce=DEBOUNCE):
+        self.organizer = organizer
+        self.generator = generator
+        self.interval = interval
+        self.debounce = debounce
+        self.path = organizer.raw_notes_file
+        self._signature = self.signature()
+    
+    @classmethod
+    def for_organizer(cls, organizer, interval=INTERVAL, debounce=DEBOUNCE, use_archive=False):
+        """整理する側と同じディレクトリ・データベースを使うジェネレーターと組み合わせる"""
+        generator = IshiharaArticleGenerator(organizer.base_dir, use_archive=use_archive,
+                                             db_file=organizer.db.path if organizer.db else None)
+        return cls(organizer, generator, interval, debounce)
+    
+    def signature(self):
+        """ファイルの (更新時刻, サイズ)（ファイルがなければNone）"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def wait_for_change(self):
+        """ファイルが更新され、debounce 秒のあいだ変わらなくなるまで待つ"""
+        while True:
+            time.sleep(self.interval)
+            signature = self.signature()
+            if signature != self._signature:
+                break
+        
+        # 保存の途中や連続した保存は、落ち着くまで待って1回にまとめる
+        settled_at = time.monotonic()
+        while time.monotonic() - settled_at < self.debounce:
+            time.sleep(self.interval)
+            current = self.signature()
+            if current != signature:
+                signature = current
+                settled_at = time.monotonic()
+        
+        self._signature = signature
+        return signature
+    
+    def update(self):
+        """差分の整理を行い、考えが変わった記事だけを作り直す"""
+        started = time.perf_counter()
+        self.organizer.organize(incremental=True)
+        
+        # テンプレートや変換ルールも更新されていれば読み直す
+        reloaded = self.generator.refresh_inputs()
+        if reloaded:
+            print(f"読み直しました: {', '.join(reloaded)}")
+        results = self.generator.rebuild()
+        
+        elapsed = time.perf_counter() - started
+        print(f"更新しました（整理と{len(results)}件の作り直しに{elapsed:.2f}秒）")
+        return results
+    
+    def run(self):
+        """起動時に一度整理してから、Ctrl+C で止めるまで監視を続ける"""
+        print(f"{self.path} を監視します（Ctrl+C で終了）")
+        try:
+            self.update_safely()
+            while True:
+                signature = self.wait_for_change()
+                if signature is None:
+                    print(f"警告: {self.path} が見つかりません")
+                    continue
+                print(f"\n{self.path} が更新されました")
+                self.update_safely()
+        except KeyboardInterrupt:
+            print("\n監視を終了します")
+        finally:
+            self.generator.save_caches()
+    
+    def update_safely(self):
+        """保存の途中のファイルを読んだ時などは、エラーを表示して次の更新を待つ"""
+        try:
+            return self.update()
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"エラー: 更新に失敗しました: {e}")
+            return []